@@ -1,20 +1,47 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Request
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+import asyncio
 import os
+import time
 import uuid
 import json
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 import aiofiles
 from pathlib import Path
 
+from chat_sessions import ChatSessionStore
+from executors import ExecutionLayer
 from rag_pipeline import RAGPipeline
-from summarizer import PaperSummarizer
-from utils.pdf_processor import PDFProcessor
+from summarizer import SUMMARY_FACETS, PaperSummarizer
+from summary_facets import SummaryFacets, facet_statuses, parse_facets, pending_facets
+from telemetry import HTTP_SECONDS, REGISTRY, Gauge, span, start_trace
+from utils.pdf_processor import extract_pdf
 from utils.url_processor import URLProcessor
+from utils.batch_ingest import BatchIngester
+from utils.upload_stream import UploadTooLarge, receive_multipart_upload
+from utils.zip_stream import ZipStreamWriter, safe_archive_name
 
-app = FastAPI(title="ResearchRAG API", version="1.0.0")
+async def load_index():
+    await execution.run_io(rag_pipeline.load)
+    # The old index keeps serving while it is re-embedded with a new EMBEDDING_MODEL
+    if rag_pipeline.needs_migration and os.getenv("EMBEDDING_MIGRATION", "true").lower() != "false":
+        await execution.run_io(rag_pipeline.migration.run)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the index in the background so the server accepts requests right away;
+    # "/" reports readiness and index-backed requests wait for the load to finish
+    loading = asyncio.create_task(load_index())
+    yield
+    if not loading.done():
+        rag_pipeline.migration.stop()
+        loading.cancel()
+    execution.shutdown()
+
+app = FastAPI(title="ResearchRAG API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -25,20 +52,108 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize components
-rag_pipeline = RAGPipeline()
+# Initialize components; the index itself is loaded by the lifespan hook
+rag_pipeline = RAGPipeline(load=False)
 summarizer = PaperSummarizer()
-pdf_processor = PDFProcessor()
 url_processor = URLProcessor()
 
+# Multi-turn chat memory, shared by all worker processes
+chat_sessions = ChatSessionStore(
+    Path(os.getenv("CHAT_SESSIONS_DIR", "chat_sessions")),
+    max_sessions=int(os.getenv("CHAT_SESSIONS_MAX", "1000")),
+    ttl=float(os.getenv("CHAT_SESSION_TTL", "3600"))
+)
+
+# Blocking work runs in these pools so the event loop stays responsive
+execution = ExecutionLayer(
+    cpu_workers=int(os.getenv("CPU_WORKERS", "0")) or None,
+    io_workers=int(os.getenv("IO_WORKERS", "0")) or None
+)
+
 # Data storage
 UPLOAD_DIR = Path("uploads")
 DATA_DIR = Path("data")
 UPLOAD_DIR.mkdir(exist_ok=True)
 DATA_DIR.mkdir(exist_ok=True)
 
+# Summary facets are generated on first request; these are started in the background right after upload
+summaries = SummaryFacets(summarizer, DATA_DIR, retry_after=float(os.getenv("SUMMARY_RETRY_AFTER", "60")))
+SUMMARY_PREFETCH = parse_facets(os.getenv("SUMMARY_PREFETCH", "summary"))
+
+# Keeps background tasks referenced until they finish
+_background_tasks = set()
+
+# Paper titles never change, so related-paper lookups read each data file once
+_paper_titles: Dict[str, str] = {}
+
+# Upload limits
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024
+
+# Largest number of questions accepted by /chat/batch
+MAX_CHAT_BATCH = int(os.getenv("CHAT_BATCH_MAX", "500"))
+
+# Largest number of sources accepted by /upload-papers; the whole batch runs within one request
+MAX_INGEST_BATCH = int(os.getenv("BATCH_INGEST_MAX", "50"))
+
+# Papers a bulk export loads and summarizes at once; by default enough to keep the I/O pool busy
+# with one LLM call per facet, without queueing a call for every paper in the request
+BULK_EXPORT_CONCURRENCY = int(os.getenv("BULK_EXPORT_CONCURRENCY", "0")) or max(1, execution.io.max_workers // len(SUMMARY_FACETS))
+
+# Scrape-time gauges alongside the stage and LLM metrics in telemetry
+REGISTRY.register(Gauge(
+    "researchrag_executor_in_flight", "Tasks submitted to a worker pool and not finished.", ["pool"],
+    lambda: [((name,), pool["in_flight"]) for name, pool in execution.stats().items()]
+))
+REGISTRY.register(Gauge(
+    "researchrag_executor_queue_depth", "Tasks waiting for a free worker.", ["pool"],
+    lambda: [((name,), pool["queue_depth"]) for name, pool in execution.stats().items()]
+))
+REGISTRY.register(Gauge(
+    "researchrag_executor_restarts", "Times a pool was replaced after a worker died.", ["pool"],
+    lambda: [((name,), pool["restarts"]) for name, pool in execution.stats().items()]
+))
+REGISTRY.register(Gauge(
+    "researchrag_index_chunks", "Chunks in this worker's current index snapshot.", [],
+    lambda: [((), sum(len(chunks) for chunks in rag_pipeline.chunks.values()))]
+))
+REGISTRY.register(Gauge(
+    "researchrag_chat_sessions", "Live chat sessions.", [],
+    lambda: [((), len(chat_sessions))]
+))
+
+batch_ingester = BatchIngester(
+    rag_pipeline,
+    summaries,
+    data_dir=DATA_DIR,
+    max_workers=int(os.getenv("BATCH_INGEST_WORKERS", "8")),
+    max_per_host=int(os.getenv("BATCH_INGEST_PER_HOST", "2")),
+    host_interval=float(os.getenv("BATCH_INGEST_HOST_INTERVAL", "1.0"))
+)
+
 class ChatRequest(BaseModel):
     query: str
+    session_id: Optional[str] = None
+
+class RetrieveRequest(BaseModel):
+    query: str
+    top_k: int = 5
+    min_similarity: Optional[float] = None
+
+class BatchChatQuestion(BaseModel):
+    paper_id: str
+    query: str
+
+class BatchChatRequest(BaseModel):
+    questions: List[BatchChatQuestion]
+
+class BatchUploadRequest(BaseModel):
+    sources: List[str]
+    summarize: bool = True
+
+class BulkExportRequest(BaseModel):
+    paper_ids: Optional[List[str]] = None
+    title_contains: Optional[str] = None
+    format: str = "pdf"
 
 class PaperResponse(BaseModel):
     paper_id: str
@@ -47,61 +162,169 @@ class PaperResponse(BaseModel):
     pros: list[str]
     cons: list[str]
     future_work: list[str]
+    facets: Dict[str, Dict]
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse uploads whose declared size is already over the limit, before reading the body."""
+    if request.url.path == "/upload-paper":
+        content_length = request.headers.get("content-length")
+        # Allow some room for the multipart envelope and form fields
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + 64 * 1024:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)}MB upload limit"}
+            )
+    return await call_next(request)
+
+def _route_label(request: Request) -> str:
+    """Route template for metric labels, so paper IDs don't create new series."""
+    endpoint = request.scope.get("endpoint")
+    if endpoint is not None:
+        for route in app.routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Time each request and report its per-stage breakdown and LLM usage in headers."""
+    start = time.perf_counter()
+    with start_trace() as trace:
+        response = await call_next(request)
+    
+    HTTP_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        route=_route_label(request),
+        status=response.status_code
+    )
+    if trace.stages:
+        response.headers["Server-Timing"] = trace.server_timing()
+    if trace.llm_calls:
+        response.headers["X-LLM-Usage"] = trace.llm_usage()
+    return response
+
+async def _load_paper(data_file: Path) -> Dict:
+    async with aiofiles.open(data_file, 'r') as f:
+        return json.loads(await f.read())
+
+async def _generate_facets(paper_id: str, facets: Iterable[str], retry: bool = False):
+    """Generate summary facets concurrently and wait for all of them."""
+    await asyncio.gather(*(execution.run_io(summaries.generate, paper_id, facet, retry) for facet in facets))
+
+async def _paper_title(paper_id: str) -> str:
+    title = _paper_titles.get(paper_id)
+    if title is None:
+        data_file = DATA_DIR / f"{paper_id}.json"
+        if not data_file.exists():
+            return "Untitled Paper"
+        title = _paper_titles[paper_id] = (await _load_paper(data_file)).get("title", "Untitled Paper")
+    return title
+
+def _finish_background_task(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Error in background task: {task.exception()}")
+
+def _prefetch_facets(paper_id: str, facets: Iterable[str], retry: bool = False):
+    """Start generating summary facets without waiting for them."""
+    for facet in facets:
+        task = asyncio.ensure_future(execution.run_io(summaries.generate, paper_id, facet, retry))
+        _background_tasks.add(task)
+        task.add_done_callback(_finish_background_task)
 
 @app.get("/")
 async def root():
-    return {"message": "ResearchRAG API is running"}
+    """Health check; 503 until the index has finished loading."""
+    if not rag_pipeline.is_loaded:
+        return JSONResponse(
+            status_code=503,
+            content={"message": "ResearchRAG API is starting", "status": "loading"}
+        )
+    return {"message": "ResearchRAG API is running", "status": "ready"}
+
+@app.get("/stats")
+async def stats():
+    """Worker pool load (in-flight tasks, queue depth and totals per pool) and embedding migration progress."""
+    return {"executors": execution.stats(), "embedding_migration": rag_pipeline.migration.status()}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this worker process."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 @app.post("/upload-paper")
-async def upload_paper(
-    file: Optional[UploadFile] = File(None),
-    url: Optional[str] = Form(None)
-):
-    """Upload a PDF file or provide a URL to process a research paper."""
-    if not file and not url:
+async def upload_paper(request: Request):
+    """Upload a PDF file or provide a URL to process a research paper.
+    
+    Expects multipart/form-data with either a ``file`` part or a ``url`` field,
+    or an urlencoded form with ``url``. Files are streamed to disk as they
+    arrive rather than buffered in memory.
+    """
+    content_type = request.headers.get("content-type", "")
+    multipart = content_type.startswith("multipart/form-data")
+    if not multipart and not content_type.startswith("application/x-www-form-urlencoded"):
         raise HTTPException(status_code=400, detail="Either file or URL must be provided")
     
     paper_id = str(uuid.uuid4())
+    file_path = UPLOAD_DIR / f"{paper_id}.pdf"
     
     try:
-        if file:
-            # Handle file upload
-            file_path = UPLOAD_DIR / f"{paper_id}.pdf"
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
-            
-            # Extract text from PDF
-            text_content = pdf_processor.extract_text(str(file_path))
-            title = pdf_processor.extract_title(text_content)
+        with span("upload.receive"):
+            if multipart:
+                fields, upload = await receive_multipart_upload(request, file_path, MAX_UPLOAD_BYTES)
+            else:
+                # An urlencoded form can only carry a URL, so there is nothing to stream
+                form = await request.form()
+                fields, upload = {"url": form.get("url")}, None
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)}MB upload limit"
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid upload: {str(e)}")
+    
+    url = fields.get("url")
+    if not upload and not url:
+        raise HTTPException(status_code=400, detail="Either file or URL must be provided")
+    
+    try:
+        if upload:
+            # Extract text straight from the streamed file
+            with span("upload.extract_pdf"):
+                text_content, title = await execution.run_cpu(extract_pdf, str(upload.path))
             
         else:
             # Handle URL
-            text_content, title = url_processor.process_url(url)
+            with span("upload.fetch_url"):
+                text_content, title = await execution.run_io(url_processor.process_url, url)
         
         # Store paper data
         paper_data = {
             "paper_id": paper_id,
             "title": title,
             "content": text_content,
-            "source": file.filename if file else url
+            "source": upload.filename if upload else url,
+            "facets": pending_facets()
         }
+        if upload:
+            paper_data["content_hash"] = upload.sha256
+            paper_data["size_bytes"] = upload.size
         
         # Save paper data
         data_file = DATA_DIR / f"{paper_id}.json"
-        async with aiofiles.open(data_file, 'w') as f:
-            await f.write(json.dumps(paper_data, indent=2))
+        with span("upload.save"):
+            async with aiofiles.open(data_file, 'w') as f:
+                await f.write(json.dumps(paper_data, indent=2))
         
         # Process with RAG pipeline
-        rag_pipeline.add_document(paper_id, text_content)
-        
-        # Generate summary
-        summary_data = summarizer.generate_summary(text_content)
+        with span("upload.index"):
+            await execution.run_io(rag_pipeline.add_document, paper_id, text_content)
         
-        # Update paper data with summary
-        paper_data.update(summary_data)
-        async with aiofiles.open(data_file, 'w') as f:
-            await f.write(json.dumps(paper_data, indent=2))
+        # Summaries are generated on first request, except the facets prefetched here
+        _prefetch_facets(paper_id, SUMMARY_PREFETCH)
         
         return {
             "paper_id": paper_id,
@@ -112,18 +335,59 @@ async def upload_paper(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing paper: {str(e)}")
 
+@app.post("/upload-papers")
+async def upload_papers(request: BatchUploadRequest):
+    """Ingest a list of URLs or arXiv IDs in one batch."""
+    if not request.sources:
+        raise HTTPException(status_code=400, detail="At least one source must be provided")
+    if len(request.sources) > MAX_INGEST_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_INGEST_BATCH} sources per batch; use ingest.py for longer lists")
+    
+    try:
+        results = await execution.run_io(batch_ingester.ingest, request.sources, request.summarize)
+        succeeded = sum(1 for r in results if r["status"] == "ok")
+        
+        return {
+            "results": results,
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing batch: {str(e)}")
+
 @app.get("/summary/{paper_id}")
-async def get_summary(paper_id: str):
-    """Get the summary, pros/cons, and future work for a paper."""
+async def get_summary(paper_id: str, facets: Optional[str] = None, wait: bool = True, retry: bool = False):
+    """Get the summary, pros/cons, and future work for a paper.
+    
+    ``facets`` is a comma-separated subset of summary, pros_cons and future_work
+    (all by default). Requested facets that are not ready yet are generated first,
+    or with ``wait=false`` started in the background and reported as running.
+    Facets that failed recently are reported as failed until their ``retry_at``
+    time, unless ``retry=true``.
+    """
+    try:
+        requested = parse_facets(facets)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     data_file = DATA_DIR / f"{paper_id}.json"
     
     if not data_file.exists():
         raise HTTPException(status_code=404, detail="Paper not found")
     
     try:
-        async with aiofiles.open(data_file, 'r') as f:
-            content = await f.read()
-            paper_data = json.loads(content)
+        paper_data = await _load_paper(data_file)
+        missing = summaries.missing(paper_data, requested, retry)
+        if missing and wait:
+            await _generate_facets(paper_id, missing, retry)
+            paper_data = await _load_paper(data_file)
+        elif missing:
+            _prefetch_facets(paper_id, missing, retry)
+        
+        statuses = facet_statuses(paper_data)
+        if not wait:
+            statuses.update({facet: {"status": "running"} for facet in missing})
         
         return PaperResponse(
             paper_id=paper_data["paper_id"],
@@ -131,27 +395,111 @@ async def get_summary(paper_id: str):
             summary=paper_data.get("summary", ""),
             pros=paper_data.get("pros", []),
             cons=paper_data.get("cons", []),
-            future_work=paper_data.get("future_work", [])
+            future_work=paper_data.get("future_work", []),
+            # Only the status, any error and when it is retried; start times and worker PIDs stay internal
+            facets={
+                facet: {key: value for key, value in status.items() if key in ("status", "error", "retry_at")}
+                for facet, status in statuses.items()
+            }
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving summary: {str(e)}")
 
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest):
+    """Answer many questions, across any number of papers, in one request."""
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="At least one question must be provided")
+    if len(request.questions) > MAX_CHAT_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CHAT_BATCH} questions per batch")
+    
+    try:
+        queries = [(q.paper_id, q.query) for q in request.questions]
+        responses = await execution.run_io(rag_pipeline.query_batch, queries)
+        return {
+            "responses": [
+                {"paper_id": paper_id, "query": query, "response": response}
+                for (paper_id, query), response in zip(queries, responses)
+            ]
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing chat batch: {str(e)}")
+
+def _chat_turn(paper_id: str, query: str, session_id: Optional[str]):
+    # The session stays locked for the whole turn, across worker processes too
+    with chat_sessions.session(paper_id, session_id) as session:
+        return session.session_id, rag_pipeline.chat(paper_id, query, session)
+
 @app.post("/chat/{paper_id}")
 async def chat_with_paper(paper_id: str, request: ChatRequest):
-    """Chat with a paper using RAG."""
+    """Chat with a paper using RAG; pass back ``session_id`` to continue a conversation."""
     data_file = DATA_DIR / f"{paper_id}.json"
     
     if not data_file.exists():
         raise HTTPException(status_code=404, detail="Paper not found")
     
     try:
-        response = rag_pipeline.query(paper_id, request.query)
-        return {"response": response}
+        session_id, response = await execution.run_io(_chat_turn, paper_id, request.query, request.session_id)
+        return {"response": response, "session_id": session_id}
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
 
+@app.delete("/chat/{paper_id}/sessions/{session_id}")
+async def end_chat_session(paper_id: str, session_id: str):
+    """Forget a conversation's history."""
+    try:
+        deleted = chat_sessions.delete(paper_id, session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return {"message": "Chat session deleted"}
+
+@app.post("/retrieve/{paper_id}")
+async def retrieve_chunks(paper_id: str, request: RetrieveRequest):
+    """Return the best matching chunks and their scores, without generating an answer."""
+    data_file = DATA_DIR / f"{paper_id}.json"
+    
+    if not data_file.exists():
+        raise HTTPException(status_code=404, detail="Paper not found")
+    if not 1 <= request.top_k <= 100:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 100")
+    
+    try:
+        chunks = await execution.run_io(
+            rag_pipeline.retrieve, paper_id, request.query, request.top_k, request.min_similarity
+        )
+        return {"chunks": chunks}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving chunks: {str(e)}")
+
+@app.get("/papers/{paper_id}/related")
+async def related_papers(paper_id: str, top_k: int = 5):
+    """Papers most similar to this one overall, by the cosine similarity of their average chunk vectors."""
+    data_file = DATA_DIR / f"{paper_id}.json"
+    
+    if not data_file.exists():
+        raise HTTPException(status_code=404, detail="Paper not found")
+    if not 1 <= top_k <= 50:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 50")
+    
+    try:
+        related = await execution.run_io(rag_pipeline.related_papers, paper_id, top_k)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Paper is not indexed")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding related papers: {str(e)}")
+    
+    for paper in related:
+        paper["title"] = await _paper_title(paper["paper_id"])
+    return {"paper_id": paper_id, "related": related}
+
 @app.get("/export/{paper_id}/{format}")
 async def export_summary(paper_id: str, format: str):
     """Export paper summary as PDF or Markdown."""
@@ -164,32 +512,122 @@ async def export_summary(paper_id: str, format: str):
         raise HTTPException(status_code=404, detail="Paper not found")
     
     try:
-        async with aiofiles.open(data_file, 'r') as f:
-            content = await f.read()
-            paper_data = json.loads(content)
+        from utils.exporters import export_paper_file
+        
+        paper_data = await _load_paper(data_file)
+        await _generate_facets(paper_id, summaries.missing(paper_data, SUMMARY_FACETS))
+        
+        # Load and render in a worker process; cached exports return immediately
+        _, title, file_path = await execution.run_cpu(export_paper_file, str(data_file), format)
         
         if format == "markdown":
-            from utils.exporters import MarkdownExporter
-            exporter = MarkdownExporter()
-            file_path = exporter.export(paper_data)
             return FileResponse(
                 file_path,
                 media_type="text/markdown",
-                filename=f"{paper_data['title']}.md"
+                filename=f"{title}.md"
             )
         else:
-            from utils.exporters import PDFExporter
-            exporter = PDFExporter()
-            file_path = exporter.export(paper_data)
             return FileResponse(
                 file_path,
                 media_type="application/pdf",
-                filename=f"{paper_data['title']}.pdf"
+                filename=f"{title}.pdf"
             )
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting: {str(e)}")
 
+async def _export_paper(data_file: Path, format: str, title_filter: Optional[str]):
+    """Generate any summary facets a matching paper still lacks, then render it in the CPU pool."""
+    from utils.exporters import export_paper_file
+    
+    paper_data = await _load_paper(data_file)
+    if title_filter and title_filter.lower() not in paper_data.get("title", "Untitled Paper").lower():
+        return None
+    await _generate_facets(data_file.stem, summaries.missing(paper_data, SUMMARY_FACETS))
+    return await execution.run_cpu(export_paper_file, str(data_file), format, title_filter)
+
+def _is_paper_id(paper_id: str) -> bool:
+    """Whether an ID names a file directly inside the data directory."""
+    return bool(paper_id) and Path(paper_id).name == paper_id and not paper_id.startswith(".")
+
+async def _stream_export_zip(data_files: List[Path], format: str, title_filter: Optional[str]):
+    """Render papers in the CPU pool and stream them into a zip as each one finishes.
+    
+    At most BULK_EXPORT_CONCURRENCY papers are in progress; the next one starts as one finishes.
+    """
+    extension = "md" if format == "markdown" else "pdf"
+    writer = ZipStreamWriter()
+    errors = []
+    
+    queued = iter(data_files)
+    futures = {}
+    pending = set()
+    
+    def start_next():
+        data_file = next(queued, None)
+        if data_file is not None:
+            future = asyncio.ensure_future(_export_paper(data_file, format, title_filter))
+            futures[future] = data_file
+            pending.add(future)
+    
+    for _ in range(BULK_EXPORT_CONCURRENCY):
+        start_next()
+    
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            for future in done:
+                start_next()
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{futures[future].stem}: {str(e)}")
+                    continue
+                
+                if result is None:
+                    continue
+                
+                paper_id, title, file_path = result
+                # PDFs are already compressed; only deflate Markdown
+                for chunk in writer.add_file(file_path, safe_archive_name(title, paper_id, extension), compress=format == "markdown"):
+                    yield chunk
+    finally:
+        # The client went away: don't render papers nobody will receive
+        for future in pending:
+            future.cancel()
+    
+    if errors:
+        yield writer.add_text("errors.txt", "\n".join(errors) + "\n")
+    
+    yield writer.close()
+
+@app.post("/export/bulk")
+async def export_bulk(request: BulkExportRequest):
+    """Export many paper summaries as a single streamed zip archive."""
+    if request.format not in ["pdf", "markdown"]:
+        raise HTTPException(status_code=400, detail="Format must be 'pdf' or 'markdown'")
+    
+    if request.paper_ids is not None:
+        invalid = [paper_id for paper_id in request.paper_ids if not _is_paper_id(paper_id)]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid paper IDs: {', '.join(invalid)}")
+        data_files = [DATA_DIR / f"{paper_id}.json" for paper_id in dict.fromkeys(request.paper_ids)]
+        missing = [f.stem for f in data_files if not f.exists()]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Papers not found: {', '.join(missing)}")
+    else:
+        data_files = sorted(DATA_DIR.glob("*.json"))
+    
+    if not data_files:
+        raise HTTPException(status_code=404, detail="No papers to export")
+    
+    return StreamingResponse(
+        _stream_export_zip(data_files, request.format, request.title_contains),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="researchrag-export.zip"'}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,118 @@
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+# Filler vocabulary; planted facts use invented method names so each answer is unique
+TOPIC_WORDS = [
+    "model", "training", "attention", "layer", "encoder", "decoder", "gradient",
+    "loss", "baseline", "ablation", "dataset", "benchmark", "accuracy", "latency",
+    "representation", "retrieval", "token", "sequence", "optimizer", "variance",
+    "convolution", "embedding", "inference", "pretraining", "fine-tuning", "corpus",
+    "evaluation", "parameter", "regularization", "architecture", "throughput", "memory"
+]
+VERBS = ["improves", "reduces", "increases", "stabilizes", "outperforms", "matches", "requires", "affects"]
+DATASETS = ["ImageNet", "CIFAR-10", "SQuAD", "GLUE", "COCO", "WikiText-103", "MS-MARCO", "LibriSpeech"]
+METRICS = ["accuracy", "F1", "BLEU", "mAP", "perplexity", "recall", "word error rate", "exact match"]
+SYLLABLES = ["ka", "lo", "ven", "tri", "mor", "zel", "qua", "dex", "ori", "sul", "pha", "nix"]
+
+class SyntheticCorpus:
+    """Generated papers plus labeled queries whose answers are planted in the text.
+
+    Files on disk (one JSON object per line):
+
+        papers.jsonl   {"paper_id", "title", "pages": [str, ...]}
+        queries.jsonl  {"paper_id", "query", "answer"}
+
+    A retrieved chunk is relevant to a query when it contains ``answer``.
+    Hand-labeled query sets may give ``relevant_chunk_ids`` ("paper_id:index")
+    instead of, or as well as, ``answer``.
+    """
+
+    def __init__(self, papers: List[Dict], queries: List[Dict]):
+        self.papers = papers
+        self.queries = queries
+
+    @property
+    def num_pages(self) -> int:
+        return sum(len(paper["pages"]) for paper in self.papers)
+
+    def documents(self) -> Dict[str, str]:
+        """Paper text keyed by paper ID, pages joined as PDF extraction would."""
+        return {paper["paper_id"]: "\n\n".join(paper["pages"]) for paper in self.papers}
+
+    def save(self, directory: Path):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_jsonl(directory / "papers.jsonl", self.papers)
+        _write_jsonl(directory / "queries.jsonl", self.queries)
+
+    @classmethod
+    def load(cls, directory: Path) -> "SyntheticCorpus":
+        directory = Path(directory)
+        return cls(_read_jsonl(directory / "papers.jsonl"), _read_jsonl(directory / "queries.jsonl"))
+
+def generate_corpus(
+    num_papers: int = 20,
+    pages_per_paper: int = 10,
+    queries_per_paper: int = 10,
+    page_chars: int = 3000,
+    seed: int = 0
+) -> SyntheticCorpus:
+    """Build a reproducible corpus with one planted fact per query."""
+    rng = random.Random(seed)
+    papers = []
+    queries = []
+
+    for paper_number in range(num_papers):
+        paper_id = f"synthetic-{paper_number:05d}"
+        pages = [_filler_page(rng, page_chars) for _ in range(pages_per_paper)]
+
+        for _ in range(queries_per_paper):
+            method = f"{_pseudo_word(rng)}-{rng.randint(1, 99)}"
+            dataset = rng.choice(DATASETS)
+            metric = rng.choice(METRICS)
+            answer = f"On {dataset}, {method} reaches {rng.uniform(10, 99):.1f} {metric}."
+
+            # Plant the fact between two sentences of a random page
+            page = rng.randrange(len(pages))
+            sentences = pages[page].split(". ")
+            sentences.insert(rng.randrange(len(sentences) + 1), answer.rstrip("."))
+            pages[page] = ". ".join(sentences)
+
+            queries.append({
+                "paper_id": paper_id,
+                "query": f"What {metric} does {method} reach on {dataset}?",
+                "answer": answer.rstrip(".")
+            })
+
+        papers.append({
+            "paper_id": paper_id,
+            "title": f"On {rng.choice(TOPIC_WORDS).title()} {rng.choice(TOPIC_WORDS).title()} ({paper_number})",
+            "pages": pages
+        })
+
+    return SyntheticCorpus(papers, queries)
+
+def _pseudo_word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(3)).title()
+
+def _filler_page(rng: random.Random, page_chars: int) -> str:
+    sentences = []
+    length = 0
+    while length < page_chars:
+        words = [rng.choice(TOPIC_WORDS) for _ in range(rng.randint(4, 9))]
+        words.insert(rng.randint(1, len(words) - 1), rng.choice(VERBS))
+        sentence = " ".join(words).capitalize()
+        sentences.append(sentence)
+        length += len(sentence) + 2
+    return ". ".join(sentences) + "."
+
+def _write_jsonl(path: Path, rows: List[Dict]):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+def _read_jsonl(path: Path) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
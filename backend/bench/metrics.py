@@ -0,0 +1,38 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+def first_relevant_rank(hits: List[Dict], labeled_query: Dict) -> Optional[int]:
+    """1-based rank of the first relevant retrieved chunk, or None if none is relevant."""
+    answer = labeled_query.get("answer")
+    relevant_ids = set(labeled_query.get("relevant_chunk_ids") or [])
+
+    for rank, hit in enumerate(hits, start=1):
+        if hit["chunk_id"] in relevant_ids or (answer and answer in hit["text"]):
+            return rank
+    return None
+
+def recall_at_k(ranks: List[Optional[int]], k: int) -> float:
+    """Fraction of queries with a relevant chunk in their top k."""
+    if not ranks:
+        return 0.0
+    return sum(1 for rank in ranks if rank is not None and rank <= k) / len(ranks)
+
+def mean_reciprocal_rank(ranks: List[Optional[int]]) -> float:
+    if not ranks:
+        return 0.0
+    return sum(1.0 / rank for rank in ranks if rank is not None) / len(ranks)
+
+def latency_summary(seconds: Iterable[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max latency in milliseconds."""
+    samples = np.asarray(list(seconds), dtype=np.float64) * 1000.0
+    if samples.size == 0:
+        return {}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+        "max_ms": round(float(samples.max()), 3),
+    }
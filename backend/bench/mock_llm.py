@@ -0,0 +1,32 @@
+import time
+from types import SimpleNamespace
+
+class MockChatClient:
+    """Stands in for the OpenAI client so benchmarks run offline.
+
+    ``client.chat.completions.create(...)`` sleeps for ``latency`` seconds and
+    returns a canned answer with rough token usage.
+    """
+
+    def __init__(self, latency: float = 0.0, answer: str = "Mock answer."):
+        self.latency = latency
+        self.answer = answer
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages, **kwargs):
+        self.calls += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        completion_tokens = len(self.answer) // 4
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=self.answer))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            )
+        )
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+OpenAI-compatible stand-in for the LLM API, for offline load and latency tests.
+
+    python -m bench.mock_llm_server --port 8001 --latency 0.8 --tokens-per-sec 40 --error-429 0.05
+
+Then start the backend against it:
+
+    LLM_BASE_URL=http://localhost:8001/v1 python run.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Shaped like the answers the summarizer and chat prompts ask for
+PROS_CONS_ANSWER = json.dumps({
+    "pros": ["Clear problem statement", "Strong empirical evaluation", "Reproducible setup"],
+    "cons": ["Limited ablations", "Single domain", "High compute cost"]
+})
+LIST_ANSWER = "\n".join([
+    "- Extend the method to multilingual data",
+    "- Study robustness under distribution shift",
+    "- Reduce training cost with distillation",
+])
+TEXT_ANSWER = (
+    "The paper proposes a retrieval-augmented method, evaluates it on standard "
+    "benchmarks and reports consistent gains over strong baselines while "
+    "discussing limitations around compute and data coverage."
+)
+
+class MockLLMSettings:
+    """Latency, streaming and failure behaviour of the mock server."""
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        jitter: float = 0.1,
+        tokens_per_sec: float = 50.0,
+        error_429: float = 0.0,
+        error_500: float = 0.0,
+        seed: int = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_sec = tokens_per_sec
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.rng = random.Random(seed)
+
+def _answer_for(prompt: str) -> str:
+    if "JSON" in prompt:
+        return PROS_CONS_ANSWER
+    if 'starting with "- "' in prompt:
+        return LIST_ANSWER
+    return TEXT_ANSWER
+
+def _tokens(text: str):
+    """Split text into word-sized pieces that join back into the original."""
+    pieces = text.split(" ")
+    return [piece if i == 0 else " " + piece for i, piece in enumerate(pieces)]
+
+def create_app(settings: MockLLMSettings) -> FastAPI:
+    app = FastAPI(title="Mock LLM API")
+    stats = {"requests": 0, "errors_429": 0, "errors_500": 0}
+
+    def error_response():
+        roll = settings.rng.random()
+        if roll < settings.error_429:
+            stats["errors_429"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"Retry-After": "1"},
+                content={"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit_error", "code": 429}}
+            )
+        if roll < settings.error_429 + settings.error_500:
+            stats["errors_500"] += 1
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Internal server error (mock)", "type": "server_error", "code": 500}}
+            )
+        return None
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        # Time to first token
+        delay = max(0.0, settings.latency + settings.rng.uniform(-settings.jitter, settings.jitter))
+        await asyncio.sleep(delay)
+
+        error = error_response()
+        if error is not None:
+            return error
+
+        model = body.get("model", "mock")
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        answer = _answer_for(prompt)
+        tokens = _tokens(answer)
+        token_delay = 1.0 / settings.tokens_per_sec if settings.tokens_per_sec > 0 else 0.0
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(tokens),
+            "total_tokens": len(prompt) // 4 + len(tokens)
+        }
+
+        if not body.get("stream"):
+            await asyncio.sleep(token_delay * len(tokens))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": answer},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }
+
+        async def stream():
+            def chunk(delta, finish_reason=None):
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            for token in tokens:
+                await asyncio.sleep(token_delay)
+                yield chunk({"content": token})
+            yield chunk({}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.1, help="random +/- seconds added to the latency")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="generation speed; 0 for instant")
+    parser.add_argument("--error-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--error-500", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = MockLLMSettings(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_sec=args.tokens_per_sec,
+        error_429=args.error_429,
+        error_500=args.error_500,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Offline retrieval benchmark for ResearchRAG.
+
+Indexes a synthetic (or saved) corpus into a throwaway index with the hashing
+embedder, then reports ingest throughput, retrieval quality (recall@k, MRR)
+and latency percentiles. The LLM is mocked, so nothing touches the network.
+
+    python benchmark.py --papers 50 --pages 10
+    python benchmark.py --save-corpus bench_corpus
+    python benchmark.py --corpus bench_corpus --k 1,5,10 --generate 100 --llm-latency 0.5
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# The client is replaced with a mock, but constructing it still needs a key
+os.environ.setdefault("OPENROUTER_API_KEY", "offline-benchmark")
+
+from bench.corpus import SyntheticCorpus, generate_corpus
+from bench.metrics import first_relevant_rank, latency_summary, mean_reciprocal_rank, recall_at_k
+from bench.mock_llm import MockChatClient
+from rag_pipeline import RAGPipeline
+
+def benchmark_ingest(pipeline, corpus, batch_size):
+    documents = corpus.documents()
+    paper_ids = list(documents)
+
+    start = time.perf_counter()
+    for i in range(0, len(paper_ids), batch_size):
+        pipeline.add_documents({paper_id: documents[paper_id] for paper_id in paper_ids[i:i + batch_size]})
+    elapsed = time.perf_counter() - start
+
+    snapshot = pipeline.snapshot()
+    num_chunks = sum(len(chunks) for chunks in snapshot.chunks.values())
+    vector_bytes = sum(vectors.nbytes for vectors in snapshot.chunk_embeddings.values())
+    return {
+        "papers": len(paper_ids),
+        "pages": corpus.num_pages,
+        "chunks": num_chunks,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(corpus.num_pages / elapsed, 1),
+        "chunks_per_sec": round(num_chunks / elapsed, 1),
+        "quantization": snapshot.codec.mode if snapshot.codec is not None else "none",
+        "vector_bytes_per_chunk": round(vector_bytes / num_chunks, 1) if num_chunks else 0,
+    }
+
+def benchmark_retrieval(pipeline, queries, ks):
+    top_k = max(ks)
+    ranks = []
+    latencies = []
+    for labeled in queries:
+        start = time.perf_counter()
+        hits = pipeline.retrieve(labeled["paper_id"], labeled["query"], top_k)
+        latencies.append(time.perf_counter() - start)
+        ranks.append(first_relevant_rank(hits, labeled))
+
+    # The same queries through the batched path
+    start = time.perf_counter()
+    pipeline.retrieve_batch([(q["paper_id"], q["query"]) for q in queries], top_k)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "queries": len(queries),
+        **{f"recall@{k}": round(recall_at_k(ranks, k), 4) for k in ks},
+        "mrr": round(mean_reciprocal_rank(ranks), 4),
+        "latency": latency_summary(latencies),
+        "batch_queries_per_sec": round(len(queries) / batch_seconds, 1) if batch_seconds > 0 else None,
+    }
+
+def benchmark_generation(pipeline, queries):
+    latencies = []
+    for labeled in queries:
+        start = time.perf_counter()
+        pipeline.query(labeled["paper_id"], labeled["query"])
+        latencies.append(time.perf_counter() - start)
+    return {"queries": len(queries), "latency": latency_summary(latencies)}
+
+def print_report(results):
+    ingest = results["ingest"]
+    print(f"📄 Ingest: {ingest['papers']} papers, {ingest['pages']} pages, {ingest['chunks']} chunks "
+          f"in {ingest['seconds']}s ({ingest['pages_per_sec']} pages/s, {ingest['chunks_per_sec']} chunks/s)")
+    print(f"   vectors: {ingest['quantization']}, {ingest['vector_bytes_per_chunk']} bytes per chunk in memory")
+
+    retrieval = results["retrieval"]
+    recalls = ", ".join(f"{key}={value}" for key, value in retrieval.items() if key.startswith("recall@"))
+    latency = retrieval["latency"]
+    print(f"🔎 Retrieval: {retrieval['queries']} queries, {recalls}, MRR={retrieval['mrr']}")
+    print(f"   latency p50={latency['p50_ms']}ms p95={latency['p95_ms']}ms p99={latency['p99_ms']}ms, "
+          f"batched {retrieval['batch_queries_per_sec']} queries/s")
+
+    if "generation" in results:
+        latency = results["generation"]["latency"]
+        print(f"💬 Generation (mock LLM): {results['generation']['queries']} queries, "
+              f"p50={latency['p50_ms']}ms p95={latency['p95_ms']}ms p99={latency['p99_ms']}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark")
+    parser.add_argument("--corpus", help="directory with papers.jsonl and queries.jsonl (default: generate one)")
+    parser.add_argument("--save-corpus", help="write the generated corpus to this directory")
+    parser.add_argument("--papers", type=int, default=20, help="synthetic papers to generate")
+    parser.add_argument("--pages", type=int, default=10, help="pages per synthetic paper")
+    parser.add_argument("--queries-per-paper", type=int, default=10, help="labeled queries per synthetic paper")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the synthetic corpus")
+    parser.add_argument("--k", default="1,3,5,10", help="comma-separated cutoffs for recall@k")
+    parser.add_argument("--ingest-batch", type=int, default=10, help="papers per add_documents call")
+    parser.add_argument("--generate", type=int, default=0, help="also time N full queries against the mock LLM")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the mock LLM sleeps per call")
+    parser.add_argument("--json", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    ks = sorted({int(k) for k in args.k.split(",") if k.strip()})
+
+    if args.corpus:
+        corpus = SyntheticCorpus.load(args.corpus)
+    else:
+        corpus = generate_corpus(args.papers, args.pages, args.queries_per_paper, seed=args.seed)
+        if args.save_corpus:
+            corpus.save(args.save_corpus)
+            print(f"💾 Corpus saved to {args.save_corpus}")
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        pipeline = RAGPipeline(storage_dir=storage_dir)
+        pipeline.client = MockChatClient(latency=args.llm_latency)
+
+        results = {
+            "ingest": benchmark_ingest(pipeline, corpus, args.ingest_batch),
+            "retrieval": benchmark_retrieval(pipeline, corpus.queries, ks),
+        }
+        if args.generate:
+            results["generation"] = benchmark_generation(pipeline, corpus.queries[:args.generate])
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
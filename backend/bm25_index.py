@@ -0,0 +1,120 @@
+import math
+import pickle
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Keeps compound identifiers such as "resnet-50", "eq.3" or "bert_base" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[._-][a-z0-9]+)*")
+PART_PATTERN = re.compile(r"[._-]")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "was",
+    "were", "which", "with", "what", "how", "does", "do", "paper"
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; compound tokens are also indexed by their parts."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if PART_PATTERN.search(token):
+            tokens.extend(part for part in PART_PATTERN.split(token) if part and part not in STOPWORDS)
+    return tokens
+
+class PaperPostings:
+    """Immutable BM25 postings for one paper's chunks.
+
+    Each term maps to a pair of parallel arrays: chunk indices (int32) and
+    term frequencies (float32), so scoring is a handful of numpy operations.
+    """
+
+    def __init__(self, chunks: List[str]):
+        term_postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        doc_lengths = np.zeros(len(chunks), dtype=np.float32)
+
+        for chunk_idx, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk))
+            doc_lengths[chunk_idx] = sum(counts.values())
+            for term, tf in counts.items():
+                ids, tfs = term_postings.setdefault(term, ([], []))
+                ids.append(chunk_idx)
+                tfs.append(tf)
+
+        self.num_chunks = len(chunks)
+        self.doc_lengths = doc_lengths
+        self.avg_length = float(doc_lengths.mean()) if len(chunks) else 0.0
+        self.postings = {
+            term: (np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.float32))
+            for term, (ids, tfs) in term_postings.items()
+        }
+
+class BM25Index:
+    """Per-paper BM25 inverted index over chunk text."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.papers: Dict[str, PaperPostings] = {}
+
+    def add(self, paper_id: str, chunks: List[str]):
+        """Index (or re-index) one paper's chunks."""
+        self.papers[paper_id] = PaperPostings(chunks)
+
+    def copy(self) -> "BM25Index":
+        """Shallow copy; postings are immutable so they are shared, not duplicated."""
+        clone = BM25Index(self.k1, self.b)
+        clone.papers = dict(self.papers)
+        return clone
+
+    def search(self, paper_id: str, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """Return (chunk index, BM25 score) pairs for the best matching chunks."""
+        paper = self.papers.get(paper_id)
+        if paper is None or paper.num_chunks == 0 or top_k <= 0:
+            return []
+
+        scores = np.zeros(paper.num_chunks, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * paper.doc_lengths / max(paper.avg_length, 1e-9))
+
+        for term in set(tokenize(query)):
+            posting = paper.postings.get(term)
+            if posting is None:
+                continue
+            ids, tfs = posting
+            idf = math.log(1 + (paper.num_chunks - len(ids) + 0.5) / (len(ids) + 0.5))
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm[ids])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) == 0:
+            return []
+
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+
+        return [(int(idx), float(scores[idx])) for idx in matched]
+
+    def save(self, path: Path):
+        with open(path, "wb") as f:
+            pickle.dump({"k1": self.k1, "b": self.b, "papers": self.papers}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path: Path):
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        self.k1 = data.get("k1", self.k1)
+        self.b = data.get("b", self.b)
+        self.papers = data.get("papers", {})
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse several ranked lists of chunk indices into one (index, score) ranking."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking):
+            fused[idx] = fused.get(idx, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,184 @@
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from context_builder import estimate_tokens
+
+# Longest answer kept verbatim in a session's history
+MAX_TURN_CHARS = 2000
+
+# Paper and session IDs become file names, so they are limited to these characters
+SESSION_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+class ChatSession:
+    """One conversation about one paper.
+
+    Recent turns are kept as (question, answer) pairs; older ones are folded
+    into ``summary``. ``lock`` serializes turns, so a follow-up never reads
+    half-updated history.
+    """
+
+    __slots__ = ("session_id", "paper_id", "summary", "turns", "lock")
+
+    def __init__(self, session_id: str, paper_id: str):
+        self.session_id = session_id
+        self.paper_id = paper_id
+        self.summary = ""
+        self.turns: List[Tuple[str, str]] = []
+        self.lock = threading.Lock()
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.turns and not self.summary
+
+    def add_turn(self, question: str, answer: str):
+        self.turns.append((question, answer[:MAX_TURN_CHARS]))
+
+    def fold(self, count: int, summary: str):
+        """Replace the oldest ``count`` turns with a summary of everything before the rest."""
+        self.turns = self.turns[count:]
+        self.summary = summary
+
+    def format_turns(self, turns: List[Tuple[str, str]]) -> str:
+        return "\n".join(f"User: {question}\nAssistant: {answer}" for question, answer in turns)
+
+    def history(self) -> str:
+        """The conversation so far as prompt text: the summary, then recent turns."""
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of earlier conversation: {self.summary}")
+        if self.turns:
+            parts.append(self.format_turns(self.turns))
+        return "\n".join(parts)
+
+    def history_tokens(self) -> int:
+        return estimate_tokens(self.history())
+
+    def to_dict(self) -> Dict:
+        return {"summary": self.summary, "turns": [list(turn) for turn in self.turns]}
+
+    @classmethod
+    def from_dict(cls, session_id: str, paper_id: str, data: Dict) -> "ChatSession":
+        session = cls(session_id, paper_id)
+        session.summary = data.get("summary", "")
+        session.turns = [(question, answer) for question, answer in data.get("turns", [])]
+        return session
+
+class ChatSessionStore:
+    """Chat sessions shared by all worker processes, one JSON file per session.
+
+    A turn holds an exclusive flock on its session's file from loading the
+    history until the new turn is written back, so turns of one conversation
+    never interleave even when they reach different workers. Sessions idle
+    for longer than ``ttl`` seconds expire, and beyond ``max_sessions`` the
+    least recently used are removed when a new session starts.
+    """
+
+    def __init__(self, storage_dir: Path = Path("chat_sessions"), max_sessions: int = 1000, ttl: float = 3600.0):
+        self.storage_dir = Path(storage_dir)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+
+    def __len__(self) -> int:
+        return len(self._live_files(time.time()))
+
+    def _path(self, paper_id: str, session_id: str) -> Path:
+        if not SESSION_KEY_PATTERN.match(paper_id) or not SESSION_KEY_PATTERN.match(session_id):
+            raise ValueError("Invalid paper or session ID")
+        return self.storage_dir / f"{paper_id}.{session_id}.json"
+
+    def _live_files(self, now: float) -> List[Tuple[float, Path]]:
+        files = []
+        for path in self.storage_dir.glob("*.json"):
+            try:
+                last_used = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if now - last_used <= self.ttl:
+                files.append((last_used, path))
+        return files
+
+    @contextmanager
+    def _locked(self, path: Path, blocking: bool = True) -> Iterator[Optional[object]]:
+        """The session file, opened and flocked; None if ``blocking`` is off and it is busy."""
+        while True:
+            f = open(path, "a+")
+            try:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield None
+                    return
+                # The file may have been removed while we waited; lock the current one instead
+                if os.fstat(f.fileno()).st_nlink:
+                    yield f
+                    return
+            finally:
+                f.close()
+
+    @contextmanager
+    def session(self, paper_id: str, session_id: Optional[str] = None) -> Iterator[ChatSession]:
+        """The session with this id, locked for one turn and saved afterwards.
+
+        Unknown or expired ids start an empty session under that id; without
+        an id a fresh one is made. Raises ValueError for ids that are not
+        plain tokens.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        path = self._path(paper_id, session_id)
+        with self._locked(path) as f:
+            f.seek(0)
+            raw = f.read()
+            data = {}
+            if raw and time.time() - os.fstat(f.fileno()).st_mtime <= self.ttl:
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    print(f"Discarding unreadable chat session {session_id}")
+            if not data:
+                self._prune(keep=path)
+            session = ChatSession.from_dict(session_id, paper_id, data)
+
+            try:
+                yield session
+            except BaseException:
+                if not raw:
+                    path.unlink()
+                raise
+
+            f.seek(0)
+            f.truncate()
+            json.dump(session.to_dict(), f)
+            f.flush()
+
+    def delete(self, paper_id: str, session_id: str) -> bool:
+        path = self._path(paper_id, session_id)
+        if not path.exists():
+            return False
+        with self._locked(path) as f:
+            stat = os.fstat(f.fileno())
+            live = stat.st_size > 0 and time.time() - stat.st_mtime <= self.ttl
+            path.unlink()
+            return live
+
+    def _prune(self, keep: Path):
+        """Remove expired sessions and the least recently used ones beyond ``max_sessions``."""
+        now = time.time()
+        live = self._live_files(now)
+        live_paths = {path for _, path in live}
+        doomed = [path for path in self.storage_dir.glob("*.json") if path not in live_paths and path != keep]
+        live = sorted(entry for entry in live if entry[1] != keep)
+        doomed += [path for _, path in live[:max(0, len(live) + 1 - self.max_sessions)]]
+        for path in doomed:
+            # Sessions in the middle of a turn are left alone
+            with self._locked(path, blocking=False) as f:
+                if f is not None:
+                    path.unlink()
@@ -0,0 +1,76 @@
+from typing import List, Tuple
+
+# Prompt context budgets (in tokens) per chat model
+CONTEXT_TOKEN_BUDGETS = {
+    "openai/gpt-oss-20b:free": 700,
+}
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 700
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate: 1 token ≈ 4 characters."""
+    return (len(text) + 3) // 4
+
+class ContextBuilder:
+    """Packs retrieved chunks into a prompt context under a token budget.
+
+    Chunks are taken best-first. Overlapping or adjacent chunk spans are
+    merged so text shared between neighbouring chunks is sent only once,
+    and the result is emitted in document order.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET, merge_gap: int = 1):
+        self.token_budget = token_budget
+        self.merge_gap = merge_gap
+
+    def _merge(self, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        merged = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1] + self.merge_gap:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def build(self, document: str, candidates: List[Tuple[str, Tuple[int, int]]]) -> str:
+        """Assemble context from (chunk text, (start, end)) candidates ordered best-first.
+
+        Spans of (-1, -1) mark chunks whose position in the document is
+        unknown; those are de-duplicated by text instead.
+        """
+        budget_chars = self.token_budget * 4
+        spans: List[Tuple[int, int]] = []
+        loose: List[str] = []
+        used = 0
+
+        for text, (start, end) in candidates:
+            if start < 0:
+                if text in loose:
+                    continue
+                cost = len(text)
+                if used + cost > budget_chars:
+                    if used == 0:
+                        loose.append(text[:budget_chars])
+                        used = budget_chars
+                    continue
+                loose.append(text)
+                used += cost
+                continue
+
+            merged = self._merge(spans + [(start, end)])
+            cost = sum(e - s for s, e in merged) - sum(e - s for s, e in spans)
+            if cost <= 0:
+                # Already fully covered by selected text
+                continue
+            if used + cost > budget_chars:
+                if used == 0:
+                    # Always send something: trim the best chunk to the budget
+                    spans = [(start, start + budget_chars)]
+                    used = budget_chars
+                continue
+
+            spans = merged
+            used += cost
+
+        sections = [document[s:e].strip() for s, e in spans]
+        return "\n\n".join(section for section in sections + loose if section)
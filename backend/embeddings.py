@@ -0,0 +1,87 @@
+import hashlib
+import threading
+from typing import Dict, List
+
+import numpy as np
+
+# Model assumed for indexes saved before manifests recorded one
+DEFAULT_EMBEDDING_MODEL = "hash"
+
+class HashEmbedder:
+    """Free hash-based embeddings: SHA-256 digests read as floats, zero-padded and normalized."""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into a single (n, dimension) float32 matrix of unit vectors."""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype='float32')
+
+        # Create a simple hash-based embedding per text, as float arrays padded with zeros
+        digests = b"".join(hashlib.sha256(text.encode()).digest() for text in texts)
+        values = np.frombuffer(digests, dtype=np.float32).reshape(len(texts), -1)[:, :self.dimension]
+
+        embeddings = np.zeros((len(texts), self.dimension), dtype='float32')
+        # Some digests read as NaN or inf; zero those components so every vector is usable
+        embeddings[:, :values.shape[1]] = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+
+        # L2-normalize all rows in one vectorized step (in float64, where squares cannot overflow),
+        # so inner products are cosine similarities
+        norms = np.linalg.norm(embeddings.astype('float64'), axis=1)
+        normalized = norms > 0
+        embeddings[normalized] = embeddings[normalized] / norms[normalized, None]
+        return embeddings
+
+class SentenceTransformerEmbedder:
+    """Embeddings from a local model in the optional ``sentence-transformers`` package.
+
+    The model is loaded on first use; unlike the re-ranker there is no
+    fallback, since stored vectors are useless without the model.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 64):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        return int(self._get_model().get_sentence_embedding_dimension())
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype='float32')
+        vectors = self._get_model().encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return np.asarray(vectors, dtype='float32')
+
+_embedders: Dict[str, object] = {}
+_embedders_lock = threading.Lock()
+
+def get_embedder(name: str):
+    """The embedder for a model name: ``hash`` or ``st:<sentence-transformers model>``.
+
+    Instances are shared, so a model is only loaded once per process.
+    """
+    with _embedders_lock:
+        embedder = _embedders.get(name)
+        if embedder is None:
+            if name == "hash":
+                embedder = HashEmbedder()
+            elif name.startswith("st:"):
+                embedder = SentenceTransformerEmbedder(name[3:])
+            else:
+                raise ValueError(f"Unknown embedding model: {name}")
+            _embedders[name] = embedder
+        return embedder
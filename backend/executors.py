@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+from telemetry import call_with_trace, merge_trace
+
+class TrackedPool:
+    """An executor plus counters describing how busy it is.
+
+    ``in_flight`` counts tasks submitted but not finished; anything beyond
+    ``max_workers`` is waiting in the pool's queue. A process pool broken by
+    a worker that died (a crash in native code, an OOM kill) is dropped and
+    replaced on the next call; ``restarts`` counts how often that happened.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Executor], max_workers: int, propagate_context: bool = False):
+        self.name = name
+        self.max_workers = max_workers
+        self.propagate_context = propagate_context
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_queue_depth = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.total_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        # Pools are created on first use so idle workers cost nothing
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._factory()
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.max_workers)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run ``fn`` in this pool and await its result."""
+        if kwargs:
+            fn = functools.partial(fn, **kwargs)
+        if self.propagate_context:
+            # Spans recorded in the worker thread belong to the caller's request trace
+            fn = functools.partial(contextvars.copy_context().run, fn)
+
+        with self._lock:
+            self.in_flight += 1
+            self.submitted += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+
+        start = time.perf_counter()
+        failed = False
+        executor = self.executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            failed = True
+            self._discard(executor)
+            raise
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.total_seconds += time.perf_counter() - start
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+
+    def _discard(self, executor: Executor):
+        """Drop a broken executor so the next call builds a fresh one."""
+        with self._lock:
+            if self._executor is not executor:
+                # Another failed call already replaced it
+                return
+            self._executor = None
+            self.restarts += 1
+        print(f"{self.name} pool broke after a worker died; starting a new one")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "peak_queue_depth": self.peak_queue_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "restarts": self.restarts,
+                "total_seconds": round(self.total_seconds, 3),
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+class ExecutionLayer:
+    """Routes blocking work off the event loop.
+
+    CPU-bound work (PDF parsing, export rendering) goes to a process pool and
+    must be a picklable module-level function. Blocking I/O and work that
+    touches in-process state (LLM calls, index updates) goes to a bounded
+    thread pool.
+    """
+
+    def __init__(self, cpu_workers: Optional[int] = None, io_workers: Optional[int] = None):
+        cpu_workers = cpu_workers or os.cpu_count() or 2
+        io_workers = io_workers or 32
+
+        # Spawned workers don't inherit the server's threads or locks
+        self.cpu = TrackedPool(
+            "cpu",
+            lambda: ProcessPoolExecutor(max_workers=cpu_workers, mp_context=multiprocessing.get_context("spawn")),
+            cpu_workers
+        )
+        self.io = TrackedPool(
+            "io",
+            lambda: ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="io"),
+            io_workers,
+            propagate_context=True
+        )
+
+    async def run_cpu(self, fn: Callable, *args, **kwargs):
+        # Stage timings from the worker process come back with the result
+        result, trace = await self.cpu.run(call_with_trace, fn, *args, **kwargs)
+        merge_trace(trace)
+        return result
+
+    async def run_io(self, fn: Callable, *args, **kwargs):
+        return await self.io.run(fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {pool.name: pool.stats() for pool in (self.cpu, self.io)}
+
+    def shutdown(self):
+        self.cpu.shutdown()
+        self.io.shutdown()
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import get_embedder
+from paper_index import PaperIndex
+from telemetry import span
+
+if TYPE_CHECKING:
+    from index_store import IndexSnapshot
+    from rag_pipeline import RAGPipeline
+
+def _paper_digest(chunks: List[str]) -> str:
+    """Fingerprint of a paper's chunks, so re-uploaded papers are re-embedded."""
+    return hashlib.sha1("\x00".join(chunks).encode()).hexdigest()
+
+class ShadowIndex:
+    """Vectors re-embedded with a new model, saved batch by batch next to the live index.
+
+    Layout::
+
+        shadow/<model>/
+            progress.json       model, dimension and where each paper's vectors are
+            batch-000001.npy    one float32 matrix per embedded batch
+
+    Progress survives restarts, so an interrupted migration resumes where it
+    stopped; a directory left by a different model or dimension is discarded.
+    """
+
+    def __init__(self, directory: Path, embedding_model: str, dimension: int):
+        self.directory = Path(directory)
+        self.embedding_model = embedding_model
+        self.dimension = dimension
+        self.papers: Dict[str, Dict] = {}
+        self.batches = 0
+        self._mapped: Dict[str, np.ndarray] = {}
+
+        try:
+            with open(self.directory / "progress.json", "r") as f:
+                progress = json.load(f)
+        except (FileNotFoundError, ValueError):
+            progress = None
+        if progress and progress.get("embedding_model") == embedding_model and progress.get("dimension") == dimension:
+            self.papers = progress["papers"]
+            self.batches = progress["batches"]
+        else:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def has(self, paper_id: str, digest: str) -> bool:
+        entry = self.papers.get(paper_id)
+        return entry is not None and entry["digest"] == digest
+
+    def add_batch(self, papers: List[Tuple[str, str, int]], vectors: np.ndarray):
+        """Store the vectors of (paper_id, digest, chunk count) papers, concatenated in that order."""
+        self.batches += 1
+        name = f"batch-{self.batches:06d}.npy"
+        np.save(self.directory / name, vectors)
+
+        offset = 0
+        for paper_id, digest, count in papers:
+            self.papers[paper_id] = {"file": name, "start": offset, "end": offset + count, "digest": digest}
+            offset += count
+
+        # Replace progress.json atomically so a crash never leaves it half-written
+        temp_path = self.directory / "progress.json.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({
+                "embedding_model": self.embedding_model,
+                "dimension": self.dimension,
+                "batches": self.batches,
+                "papers": self.papers
+            }, f)
+        os.replace(temp_path, self.directory / "progress.json")
+
+    def vectors(self, paper_id: str) -> np.ndarray:
+        entry = self.papers[paper_id]
+        if entry["start"] == entry["end"]:
+            return np.zeros((0, self.dimension), dtype='float32')
+        mapped = self._mapped.get(entry["file"])
+        if mapped is None:
+            mapped = self._mapped[entry["file"]] = np.load(self.directory / entry["file"], mmap_mode="r")
+        return mapped[entry["start"]:entry["end"]]
+
+class EmbeddingMigration:
+    """Moves the index to the pipeline's EMBEDDING_MODEL without taking it offline.
+
+    Papers in the live snapshot are re-embedded in batches into a ShadowIndex
+    while the old index keeps serving queries and uploads; each pass picks up
+    papers uploaded during the previous one. The last few papers are embedded
+    under the writer lock and the shadow vectors are published as a new
+    snapshot, which every worker switches to atomically through CURRENT.
+    """
+
+    def __init__(self, pipeline: "RAGPipeline", batch_size: int = 256):
+        self.pipeline = pipeline
+        self.batch_size = batch_size
+        self.state = "idle"
+        self.source: Optional[str] = None
+        self.target: Optional[str] = None
+        self.papers_done = 0
+        self.papers_total = 0
+        self.error: Optional[str] = None
+        self._stop = threading.Event()
+
+    def status(self) -> Dict:
+        return {
+            "state": self.state,
+            "from": self.source,
+            "to": self.target,
+            "papers_done": self.papers_done,
+            "papers_total": self.papers_total,
+            "error": self.error,
+        }
+
+    def stop(self):
+        """Ask a running migration to stop after its current batch; it resumes on the next run."""
+        self._stop.set()
+
+    def run(self) -> bool:
+        """Migrate if needed; True once the live index uses EMBEDDING_MODEL.
+
+        Returns False without waiting if another process is already migrating.
+        """
+        target = self.pipeline.embedding_model
+        self._stop.clear()
+        with self.pipeline.store.migration_lock() as acquired:
+            if not acquired:
+                return False
+            try:
+                return self._migrate(target)
+            except Exception as e:
+                print(f"Error migrating embeddings to {target}: {e}")
+                self.state = "failed"
+                self.error = str(e)
+                return False
+
+    def _migrate(self, target: str) -> bool:
+        pipeline = self.pipeline
+        snapshot = pipeline.snapshot()
+        if snapshot.embedding_model == target:
+            return True
+
+        self.state = "running"
+        self.source = snapshot.embedding_model
+        self.target = target
+        self.error = None
+        shadow_root = pipeline.storage_dir / "shadow"
+        shadow = ShadowIndex(
+            shadow_root / re.sub(r"[^A-Za-z0-9._-]+", "_", target),
+            target,
+            get_embedder(target).dimension
+        )
+
+        # Catch up while the old index serves; uploads made meanwhile show up in the next pass
+        while True:
+            snapshot = pipeline.snapshot()
+            pending = self._pending(snapshot, shadow)
+            if sum(len(chunks) for _, _, chunks in pending) <= self.batch_size:
+                break
+            if not self._embed(pending, shadow, target):
+                self.state = "stopped"
+                return False
+
+        # Cut over under the writer lock, so no upload lands between the last pass and the switch
+        with pipeline.store.writer_lock():
+            pipeline._refresh(force=True)
+            snapshot = pipeline._snapshot
+            self._embed(self._pending(snapshot, shadow), shadow, target, stoppable=False)
+            migrated = snapshot.replace(
+                codec=None,
+                embedding_model=target,
+                chunk_embeddings={paper_id: shadow.vectors(paper_id) for paper_id in snapshot.chunks},
+                exact_embeddings={},
+                # Paper vectors are recomputed from the new chunk vectors when saved
+                paper_index=PaperIndex()
+            )
+            with span("migration.cutover"):
+                pipeline._install(pipeline._save_index(migrated))
+
+        shutil.rmtree(shadow_root, ignore_errors=True)
+        self.state = "done"
+        print(f"✅ Index migrated from {self.source} to {target} embeddings")
+        return True
+
+    def _pending(self, snapshot: "IndexSnapshot", shadow: ShadowIndex) -> List[Tuple[str, str, List[str]]]:
+        """(paper_id, digest, chunks) for papers the shadow index lacks or has stale vectors for."""
+        pending = []
+        for paper_id, chunks in snapshot.chunks.items():
+            digest = _paper_digest(chunks)
+            if not shadow.has(paper_id, digest):
+                pending.append((paper_id, digest, chunks))
+        self.papers_total = len(snapshot.chunks)
+        self.papers_done = self.papers_total - len(pending)
+        return pending
+
+    def _embed(
+        self,
+        pending: List[Tuple[str, str, List[str]]],
+        shadow: ShadowIndex,
+        target: str,
+        stoppable: bool = True
+    ) -> bool:
+        """Embed papers into the shadow index about ``batch_size`` chunks at a time; False if stopped."""
+        batch: List[Tuple[str, str, List[str]]] = []
+        size = 0
+        for position, item in enumerate(pending):
+            batch.append(item)
+            size += len(item[2])
+            if size < self.batch_size and position < len(pending) - 1:
+                continue
+
+            with span("migration.embed"):
+                vectors = self.pipeline._get_embeddings([chunk for _, _, chunks in batch for chunk in chunks], target)
+            shadow.add_batch([(paper_id, digest, len(chunks)) for paper_id, digest, chunks in batch], vectors)
+            self.papers_done += len(batch)
+            batch = []
+            size = 0
+
+            if stoppable and self._stop.is_set():
+                return False
+        return True
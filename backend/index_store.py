@@ -0,0 +1,236 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bm25_index import BM25Index
+from embeddings import DEFAULT_EMBEDDING_MODEL
+from paper_index import PaperIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to an in-process lock
+    fcntl = None
+
+if TYPE_CHECKING:
+    from quantization import VectorCodec
+
+# Version 2 added manifest.json; version 1 snapshots were all hash-embedded
+INDEX_FORMAT_VERSION = 2
+
+class IndexSnapshot:
+    """One consistent, immutable version of the in-memory index.
+
+    Readers grab the pipeline's current snapshot once and use it for the whole
+    request; writers build a new snapshot and swap the reference, so a search
+    never sees a paper's chunks without its embeddings. Nothing reachable from
+    a published snapshot may be mutated.
+
+    ``chunk_embeddings`` holds float32 vectors when ``codec`` is None and
+    the codec's uint8 codes otherwise. ``exact_embeddings`` keeps float32
+    vectors (memory-mapped) next to the codes when exact re-scoring is on.
+    All vectors come from ``embedding_model``, which queries must use too.
+    ``paper_index`` holds one vector per paper for finding related papers.
+    """
+
+    __slots__ = (
+        "version", "codec", "documents", "chunks", "chunk_spans",
+        "chunk_embeddings", "exact_embeddings", "bm25", "embedding_model", "paper_index"
+    )
+
+    def __init__(
+        self,
+        version: Optional[str],
+        codec: Optional["VectorCodec"],
+        documents: Dict[str, str],
+        chunks: Dict[str, List[str]],
+        chunk_spans: Dict[str, List[Tuple[int, int]]],
+        chunk_embeddings: Dict[str, np.ndarray],
+        exact_embeddings: Dict[str, np.ndarray],
+        bm25: BM25Index,
+        embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+        paper_index: Optional[PaperIndex] = None
+    ):
+        self.version = version
+        self.codec = codec
+        self.documents = documents
+        self.chunks = chunks
+        self.chunk_spans = chunk_spans
+        self.chunk_embeddings = chunk_embeddings
+        self.exact_embeddings = exact_embeddings
+        self.bm25 = bm25
+        self.embedding_model = embedding_model
+        self.paper_index = paper_index if paper_index is not None else PaperIndex()
+
+    @classmethod
+    def empty(cls, embedding_model: str = DEFAULT_EMBEDDING_MODEL) -> "IndexSnapshot":
+        return cls(None, None, {}, {}, {}, {}, {}, BM25Index(), embedding_model)
+
+    def vectors(self, paper_id: str) -> np.ndarray:
+        """A paper's chunk vectors as float32, decoded if they are quantized."""
+        stored = self.chunk_embeddings[paper_id]
+        if self.codec is None:
+            return stored
+        return self.codec.decode(stored)
+
+    def replace(self, **changes) -> "IndexSnapshot":
+        """Copy of this snapshot with some fields replaced."""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return IndexSnapshot(**fields)
+
+class IndexStore:
+    """Versioned on-disk snapshots of the RAG index, shared by all worker processes.
+
+    Layout::
+
+        rag_storage/
+            CURRENT             name of the live snapshot (replaced atomically)
+            writer.lock         exclusive lock held while the index is mutated
+            migration.lock      held by the one process re-embedding the index
+            shadow/             re-embedded vectors of a migration in progress
+            snapshots/v00000042/
+                manifest.json           format version, embedding model, dimension
+                metadata.json  bm25.pkl
+                embeddings.npy          float32 vectors (unquantized, or kept for re-scoring)
+                codes.npy  codec.faiss  quantized vectors and their quantizer
+                paper_vectors.npy  paper_ids.json   one vector per paper (see PaperIndex)
+
+    Only the holder of the writer lock may publish. A snapshot is written to a
+    temporary directory, renamed into place, and then made live by atomically
+    replacing CURRENT, so readers never observe a half-written index.
+    """
+
+    def __init__(self, storage_dir: Path, keep: int = 3):
+        self.storage_dir = Path(storage_dir)
+        self.snapshots_dir = self.storage_dir / "snapshots"
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        self.keep = keep
+        self._thread_lock = threading.Lock()
+        self._migration_lock = threading.Lock()
+
+    @property
+    def current_path(self) -> Path:
+        return self.storage_dir / "CURRENT"
+
+    def current_version(self) -> Optional[str]:
+        """Name of the live snapshot, or None if nothing has been published."""
+        try:
+            version = self.current_path.read_text().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def snapshot_path(self, version: str) -> Path:
+        return self.snapshots_dir / version
+
+    def read_manifest(self, version: str) -> Dict:
+        """A snapshot's manifest, with format 1 defaults for snapshots written before manifests."""
+        try:
+            with open(self.snapshot_path(version) / "manifest.json", "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"format_version": 1, "embedding_model": DEFAULT_EMBEDDING_MODEL}
+
+    def write_manifest(self, path: Path, **fields):
+        """Write manifest.json into a snapshot directory being published."""
+        with open(path / "manifest.json", "w") as f:
+            json.dump({"format_version": INDEX_FORMAT_VERSION, **fields}, f)
+
+    @contextmanager
+    def writer_lock(self):
+        """Hold the exclusive writer lock across processes (and threads)."""
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+
+            with open(self.storage_dir / "writer.lock", "a+") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def migration_lock(self):
+        """Try to become the only process migrating the index; yields whether that worked."""
+        if not self._migration_lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            if fcntl is None:
+                yield True
+                return
+
+            with open(self.storage_dir / "migration.lock", "a+") as lock_file:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._migration_lock.release()
+
+    def publish(self, write_fn: Callable[[Path], None]) -> str:
+        """Write a new snapshot with ``write_fn(directory)`` and make it live.
+
+        Must be called while holding ``writer_lock``. Returns the new version.
+        """
+        current = self.current_version()
+        number = int(current[1:]) + 1 if current else 1
+        version = f"v{number:08d}"
+
+        temp_dir = self.snapshots_dir / f".tmp-{uuid.uuid4().hex}"
+        temp_dir.mkdir()
+        try:
+            write_fn(temp_dir)
+            for path in temp_dir.iterdir():
+                self._fsync(path)
+            os.rename(temp_dir, self.snapshot_path(version))
+        except Exception:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+        # Swap the pointer atomically
+        temp_pointer = self.storage_dir / f".CURRENT.{uuid.uuid4().hex}"
+        with open(temp_pointer, "w") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_pointer, self.current_path)
+
+        self._prune(version)
+        return version
+
+    def _fsync(self, path: Path):
+        with open(path, "rb") as f:
+            os.fsync(f.fileno())
+
+    def _prune(self, live_version: str):
+        """Remove old snapshots and leftovers from interrupted writes.
+
+        Recent versions are kept so readers that have not refreshed yet can
+        still open them; on POSIX, files already memory-mapped stay valid
+        after deletion anyway.
+        """
+        versions: List[str] = sorted(
+            p.name for p in self.snapshots_dir.iterdir() if p.name.startswith("v")
+        )
+        stale = versions[:-self.keep] if self.keep > 0 else versions
+        for version in stale:
+            if version != live_version:
+                shutil.rmtree(self.snapshot_path(version), ignore_errors=True)
+
+        for path in self.snapshots_dir.glob(".tmp-*"):
+            shutil.rmtree(path, ignore_errors=True)
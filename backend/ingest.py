@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Batch-ingest a reading list of URLs / arXiv IDs into ResearchRAG.
+
+Run from the backend directory so the same data and index storage is used:
+
+    python ingest.py reading_list.txt
+    python ingest.py 2301.00001 arXiv:1706.03762 --no-summary
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from rag_pipeline import RAGPipeline
+from summarizer import PaperSummarizer
+from summary_facets import SummaryFacets
+from utils.batch_ingest import BatchIngester
+
+def read_sources(inputs):
+    """Expand file arguments (or '-' for stdin) into a flat list of sources."""
+    sources = []
+    for item in inputs:
+        if item == "-":
+            lines = sys.stdin.read().splitlines()
+        elif Path(item).is_file():
+            lines = Path(item).read_text().splitlines()
+        else:
+            lines = [item]
+
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                sources.append(line)
+    return sources
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-ingest papers by URL or arXiv ID")
+    parser.add_argument("inputs", nargs="+", help="URLs, arXiv IDs, files with one source per line, or '-'")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent downloads")
+    parser.add_argument("--per-host", type=int, default=2, help="concurrent downloads per host")
+    parser.add_argument("--host-interval", type=float, default=1.0, help="seconds between requests to a host")
+    parser.add_argument("--no-summary", action="store_true", help="leave summaries to be generated when first viewed")
+    args = parser.parse_args()
+
+    sources = read_sources(args.inputs)
+    if not sources:
+        print("❌ No sources given")
+        return 1
+
+    ingester = BatchIngester(
+        RAGPipeline(),
+        SummaryFacets(PaperSummarizer()),
+        max_workers=args.workers,
+        max_per_host=args.per_host,
+        host_interval=args.host_interval
+    )
+
+    print(f"📄 Ingesting {len(sources)} sources...")
+    results = ingester.ingest(sources, summarize=not args.no_summary)
+
+    failed = 0
+    for r in results:
+        if r["status"] == "ok":
+            print(f"✅ {r['paper_id']}  {r['title']}")
+        else:
+            failed += 1
+            print(f"❌ {r['source']}: {r['error']}")
+
+    print(f"\n🎉 {len(results) - failed} ingested, {failed} failed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
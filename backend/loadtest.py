@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for a running ResearchRAG backend.
+
+Uploads synthetic PDFs, then mixes summary, chat and upload requests across
+worker threads and reports throughput and tail latency per endpoint. Point
+the backend at the mock LLM server to run it without an API key:
+
+    python -m bench.mock_llm_server --latency 0.5 --error-429 0.02 &
+    LLM_BASE_URL=http://localhost:8001/v1 python ../run.py &
+    python loadtest.py --papers 10 --requests 200 --concurrency 16
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from bench.corpus import generate_corpus
+from bench.metrics import latency_summary
+
+def render_pdf(paper: Dict) -> bytes:
+    """Lay out a synthetic paper as a PDF, one corpus page per PDF page."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for page_number, page in enumerate(paper["pages"]):
+        text = pdf.beginText(54, 740)
+        if page_number == 0:
+            text.textLine(paper["title"])
+            text.textLine("")
+        for line in textwrap.wrap(page, 95)[:50]:
+            text.textLine(line)
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+class LoadTest:
+    """Issues requests against the API and records per-endpoint latency."""
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, List[str]] = {}
+        self.local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        # Sessions are not shared between threads
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _call(self, endpoint: str, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        error = None
+        response = None
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            if response.status_code >= 400:
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+        except requests.RequestException as e:
+            error = str(e)
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append(elapsed)
+            if error:
+                self.errors.setdefault(endpoint, []).append(error)
+        return None if error else response
+
+    def upload(self, paper: Dict):
+        files = {"file": (f"{paper['paper_id']}.pdf", render_pdf(paper), "application/pdf")}
+        response = self._call("upload", "POST", "/upload-paper", files=files)
+        return response.json().get("paper_id") if response is not None else None
+
+    def summary(self, paper_id: str):
+        self._call("summary", "GET", f"/summary/{paper_id}")
+
+    def chat(self, paper_id: str, query: str):
+        self._call("chat", "POST", f"/chat/{paper_id}", json={"query": query})
+
+    def report(self, elapsed: float) -> Dict:
+        results = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            errors = self.errors.get(endpoint, [])
+            results[endpoint] = {
+                "requests": len(samples),
+                "errors": len(errors),
+                "requests_per_sec": round(len(samples) / elapsed, 2) if elapsed > 0 else None,
+                "latency": latency_summary(samples),
+                "sample_error": errors[0] if errors else None,
+            }
+        return results
+
+def print_report(title: str, elapsed: float, results: Dict):
+    total = sum(r["requests"] for r in results.values())
+    print(f"\n{title}: {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+    for endpoint, r in results.items():
+        latency = r["latency"]
+        print(f"  {endpoint:8} {r['requests']:5} req  {r['errors']:4} err  {r['requests_per_sec']:7} req/s  "
+              f"p50={latency.get('p50_ms')}ms p95={latency.get('p95_ms')}ms p99={latency.get('p99_ms')}ms")
+        if r["sample_error"]:
+            print(f"           e.g. {r['sample_error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test upload, summary and chat concurrently")
+    parser.add_argument("--url", default="http://localhost:8000", help="backend base URL")
+    parser.add_argument("--papers", type=int, default=10, help="papers uploaded before the mixed phase")
+    parser.add_argument("--pages", type=int, default=5, help="pages per synthetic paper")
+    parser.add_argument("--requests", type=int, default=200, help="requests in the mixed phase")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent client threads")
+    parser.add_argument("--upload-share", type=float, default=0.1, help="fraction of mixed requests that upload")
+    parser.add_argument("--chat-share", type=float, default=0.6, help="fraction of mixed requests that chat")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    extra_uploads = int(args.requests * args.upload_share)
+    corpus = generate_corpus(args.papers + extra_uploads, args.pages, queries_per_paper=5, seed=args.seed)
+    questions = {}
+    for q in corpus.queries:
+        questions.setdefault(q["paper_id"], []).append(q["query"])
+
+    test = LoadTest(args.url, args.timeout)
+
+    # Phase 1: concurrent uploads build the working set
+    print(f"📄 Uploading {args.papers} papers with {args.concurrency} clients...")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        uploaded = list(pool.map(test.upload, corpus.papers[:args.papers]))
+    upload_elapsed = time.perf_counter() - start
+    upload_results = test.report(upload_elapsed)
+    print_report("Upload phase", upload_elapsed, upload_results)
+
+    papers = [
+        (paper_id, paper["paper_id"])
+        for paper_id, paper in zip(uploaded, corpus.papers)
+        if paper_id
+    ]
+    if not papers:
+        print("❌ No uploads succeeded; is the backend running?")
+        return 1
+
+    # Phase 2: summary, chat and upload requests interleaved
+    pending_uploads = iter(corpus.papers[args.papers:])
+    operations = []
+    for _ in range(args.requests):
+        roll = rng.random()
+        if roll < args.upload_share:
+            paper = next(pending_uploads, None)
+            if paper is not None:
+                operations.append((test.upload, (paper,)))
+                continue
+        paper_id, corpus_id = rng.choice(papers)
+        if roll < args.upload_share + args.chat_share:
+            operations.append((test.chat, (paper_id, rng.choice(questions[corpus_id]))))
+        else:
+            operations.append((test.summary, (paper_id,)))
+
+    test.samples.clear()
+    test.errors.clear()
+    print(f"\n⚡ Running {len(operations)} mixed requests with {args.concurrency} clients...")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(lambda op: op[0](*op[1]), operations))
+    mixed_elapsed = time.perf_counter() - start
+    mixed_results = test.report(mixed_elapsed)
+    print_report("Mixed phase", mixed_elapsed, mixed_results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"upload_phase": upload_results, "mixed_phase": mixed_results}, f, indent=2)
+
+    failed = sum(r["errors"] for r in list(upload_results.values()) + list(mixed_results.values()))
+    print(f"\n{'❌' if failed else '🎉'} {failed} failed requests")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
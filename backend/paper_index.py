@@ -0,0 +1,208 @@
+import json
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import faiss
+
+def centroid(vectors: np.ndarray) -> Optional[np.ndarray]:
+    """A paper's vector: the normalized mean of its chunk vectors, or None without chunks."""
+    if len(vectors) == 0:
+        return None
+    mean = np.asarray(vectors, dtype='float64').mean(axis=0)
+    norm = np.linalg.norm(mean)
+    if not np.isfinite(norm) or norm == 0:
+        return None
+    return (mean / norm).astype('float32')
+
+class _HNSWGraph:
+    """An HNSW graph over paper vectors, shared by a PaperIndex and the indexes derived from it.
+
+    Rows are only ever appended, so each generation adds the rows the graph
+    still lacks before searching and skips rows that only newer ones have.
+    FAISS does not allow adding while searching, so both take the lock.
+    """
+
+    def __init__(self, dimension: int, neighbors: int = 32, ef_search: int = 64, index: Optional["faiss.Index"] = None):
+        import faiss
+        if index is None:
+            index = faiss.IndexHNSWFlat(dimension, neighbors, faiss.METRIC_INNER_PRODUCT)
+        self.index = index
+        self.index.hnsw.efSearch = ef_search
+        self.lock = threading.Lock()
+
+    def _extend(self, vectors: np.ndarray):
+        # Callers hold the lock, or own the only reference to the graph
+        if self.index.ntotal < len(vectors):
+            self.index.add(np.ascontiguousarray(vectors[self.index.ntotal:], dtype='float32'))
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        with self.lock:
+            self._extend(vectors)
+            # Make up for rows added by newer generations, which the caller skips
+            k = min(self.index.ntotal, k + self.index.ntotal - len(vectors))
+            scores, labels = self.index.search(query.reshape(1, -1), k)
+        return scores[0], labels[0]
+
+    def extended_copy(self, vectors: np.ndarray) -> "_HNSWGraph":
+        """A private copy of this graph covering exactly ``vectors``; a new graph if this one went past them."""
+        import faiss
+        with self.lock:
+            if self.index.ntotal > len(vectors):
+                copy = None
+            else:
+                copy = faiss.clone_index(self.index)
+        graph = _HNSWGraph(self.index.d, index=copy) if copy is not None else _HNSWGraph(self.index.d)
+        graph._extend(vectors)
+        return graph
+
+    def save(self, path: Path):
+        import faiss
+        with self.lock:
+            faiss.write_index(self.index, str(path))
+
+    @classmethod
+    def load(cls, path: Path, row_count: int) -> Optional["_HNSWGraph"]:
+        """A saved graph, or None if there is none or it does not match the rows."""
+        import faiss
+        if not path.exists():
+            return None
+        index = faiss.read_index(str(path))
+        if index.ntotal != row_count:
+            return None
+        return cls(index.d, index=index)
+
+class PaperIndex:
+    """One vector per paper, the centroid of its chunk vectors, for finding related papers.
+
+    Immutable like IndexSnapshot: ``with_papers`` returns a new index. Rows
+    are append-only; a re-added paper gets a new row and its old row is
+    skipped, until dead rows outnumber live ones and the rows are compacted.
+    Small indexes are searched exactly; from ``ann_min_papers`` rows on, an
+    HNSW graph is searched. Before publishing, ``with_graph_copy`` extends a
+    private copy of the previous generation's graph with the new rows, so a
+    failed publish never leaves rows in a graph that published generations
+    share. The graph is saved with the rows, so workers loading the snapshot
+    keep extending it instead of building their own.
+
+    Layout in a snapshot directory::
+
+        paper_vectors.npy   float32 vector per row
+        paper_ids.json      paper ID per row; replaced papers appear more than once
+        paper_hnsw.faiss    HNSW graph over the rows, from ``ann_min_papers`` rows on
+    """
+
+    def __init__(self, row_ids: Optional[List[str]] = None, vectors: Optional[np.ndarray] = None, graph: Optional[_HNSWGraph] = None):
+        self.row_ids = row_ids or []
+        self.vectors = vectors
+        # Later rows win, so a re-added paper maps to its newest vector
+        self.positions = {paper_id: row for row, paper_id in enumerate(self.row_ids)}
+        self._graph = graph
+        self._graph_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self.positions
+
+    def with_papers(self, centroids: Dict[str, Optional[np.ndarray]]) -> "PaperIndex":
+        """Copy of this index with papers added or replaced; None vectors are left out."""
+        centroids = {paper_id: vector for paper_id, vector in centroids.items() if vector is not None}
+        if not centroids:
+            return self
+
+        new_ids = list(centroids)
+        new_vectors = np.stack([centroids[paper_id] for paper_id in new_ids]).astype('float32')
+        if self.vectors is None or self.vectors.shape[1] != new_vectors.shape[1]:
+            return PaperIndex(new_ids, new_vectors)
+
+        row_ids = self.row_ids + new_ids
+        live = len(self.positions) + sum(1 for paper_id in new_ids if paper_id not in self.positions)
+        if len(row_ids) - live > live:
+            # Mostly replaced rows: start over with one row per paper and a new graph
+            current = {paper_id: self.vectors[row] for paper_id, row in self.positions.items()}
+            current.update(centroids)
+            return PaperIndex(list(current), np.stack(list(current.values())).astype('float32'))
+
+        return PaperIndex(row_ids, np.concatenate([self.vectors, new_vectors]), self._graph)
+
+    def with_graph_copy(self, ann_min_papers: int = 5000) -> "PaperIndex":
+        """This index with its own graph over all its rows, for saving; unchanged below ``ann_min_papers`` rows."""
+        if len(self.row_ids) < ann_min_papers:
+            return self
+        if self._graph is None:
+            graph = _HNSWGraph(self.vectors.shape[1])
+            graph._extend(self.vectors)
+        else:
+            graph = self._graph.extended_copy(self.vectors)
+        return PaperIndex(self.row_ids, self.vectors, graph)
+
+    def search(self, paper_id: str, top_k: int, ann_min_papers: int = 5000) -> List[Tuple[str, float]]:
+        """The ``top_k`` papers most similar to ``paper_id`` as (paper_id, cosine similarity)."""
+        row = self.positions.get(paper_id)
+        if row is None:
+            return []
+
+        query = self.vectors[row]
+        # Fetch extra rows for the paper itself and replaced rows, which are skipped
+        fetch = top_k + 1 + len(self.row_ids) - len(self.positions)
+        if len(self.row_ids) < ann_min_papers:
+            scores = np.asarray(self.vectors @ query)
+            fetch = min(fetch, len(scores))
+            labels = np.argpartition(-scores, fetch - 1)[:fetch]
+            labels = labels[np.argsort(-scores[labels])]
+            scores = scores[labels]
+        else:
+            scores, labels = self._get_graph().search(self.vectors, query, fetch)
+
+        results = []
+        for score, label in zip(scores, labels):
+            if label < 0 or label >= len(self.row_ids):
+                continue
+            other = self.row_ids[label]
+            if other == paper_id or self.positions[other] != label:
+                continue
+            results.append((other, float(score)))
+            if len(results) == top_k:
+                break
+        return results
+
+    def _get_graph(self) -> _HNSWGraph:
+        if self._graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    self._graph = _HNSWGraph(self.vectors.shape[1])
+        return self._graph
+
+    def save(self, path: Path, ann_min_papers: int = 5000):
+        """Write the rows, and the graph once there are enough of them, into a snapshot directory being published.
+
+        Call it on an index from ``with_graph_copy``; a shared graph would be extended here otherwise.
+        """
+        if not self.row_ids:
+            np.save(path / "paper_vectors.npy", np.zeros((0, 0), dtype='float32'))
+        else:
+            np.save(path / "paper_vectors.npy", self.vectors)
+        with open(path / "paper_ids.json", "w") as f:
+            json.dump(self.row_ids, f)
+        if len(self.row_ids) >= ann_min_papers:
+            graph = self._get_graph()
+            with graph.lock:
+                graph._extend(self.vectors)
+            graph.save(path / "paper_hnsw.faiss")
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["PaperIndex"]:
+        """Load a snapshot's paper vectors; None for snapshots saved before they existed."""
+        try:
+            with open(path / "paper_ids.json", "r") as f:
+                row_ids = json.load(f)
+        except FileNotFoundError:
+            return None
+        if not row_ids:
+            return cls()
+        return cls(row_ids, np.load(path / "paper_vectors.npy"), _HNSWGraph.load(path / "paper_hnsw.faiss", len(row_ids)))
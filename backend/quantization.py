@@ -0,0 +1,98 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import faiss
+
+QUANTIZATION_MODES = ("none", "fp16", "int8", "pq")
+
+# faiss wants ~39 training points per centroid; 8-bit PQ has 256 centroids per sub-vector
+PQ_MIN_TRAINING_VECTORS = 39 * 256
+PQ_MAX_TRAINING_VECTORS = 65536
+
+class VectorCodec:
+    """Compresses embedding rows into fixed-size uint8 codes with a FAISS quantizer.
+
+    ``fp16`` halves the vector size, ``int8`` quarters it, and ``pq`` stores
+    ``pq_subquantizers`` bytes per vector. The codec wraps an empty FAISS
+    index that only holds the trained quantizer; the codes live wherever the
+    caller puts them (a memory-mapped .npy in a snapshot).
+    """
+
+    def __init__(self, mode: str, dimension: int, pq_subquantizers: int = 48, index: Optional["faiss.Index"] = None):
+        import faiss
+
+        if mode not in QUANTIZATION_MODES or mode == "none":
+            raise ValueError(f"Unsupported quantization mode: {mode}")
+        if mode == "pq" and index is None and dimension % pq_subquantizers:
+            raise ValueError(f"PQ sub-quantizers ({pq_subquantizers}) must divide the dimension ({dimension})")
+
+        self.mode = mode
+        self.dimension = dimension
+        if index is not None:
+            self.index = index
+        elif mode == "fp16":
+            self.index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+        elif mode == "int8":
+            self.index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+            # Embeddings are unit-normalized, so a fixed [-1, 1] range needs no data
+            bounds = np.stack([-np.ones(dimension), np.ones(dimension)]).astype('float32')
+            self.index.train(bounds)
+        else:
+            self.index = faiss.IndexPQ(dimension, pq_subquantizers, 8, faiss.METRIC_INNER_PRODUCT)
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.index.is_trained)
+
+    @property
+    def code_size(self) -> int:
+        return int(self.index.sa_code_size())
+
+    def train(self, vectors: np.ndarray):
+        """Fit the quantizer; only PQ needs data, at least PQ_MIN_TRAINING_VECTORS rows."""
+        if self.is_trained:
+            return
+        # k-means rejects non-finite input
+        vectors = vectors[np.isfinite(vectors).all(axis=1)]
+        if len(vectors) > PQ_MAX_TRAINING_VECTORS:
+            rows = np.random.default_rng(0).choice(len(vectors), PQ_MAX_TRAINING_VECTORS, replace=False)
+            vectors = vectors[np.sort(rows)]
+        self.index.train(np.ascontiguousarray(vectors, dtype='float32'))
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, dimension) float32 -> (n, code_size) uint8."""
+        if len(vectors) == 0:
+            return np.zeros((0, self.code_size), dtype='uint8')
+        return self.index.sa_encode(np.ascontiguousarray(vectors, dtype='float32'))
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """(n, code_size) uint8 -> approximate (n, dimension) float32."""
+        if len(codes) == 0:
+            return np.zeros((0, self.dimension), dtype='float32')
+        return self.index.sa_decode(np.ascontiguousarray(codes, dtype='uint8'))
+
+    def search(self, codes: np.ndarray, queries: np.ndarray, k: int):
+        """(inner products, indices) of the ``k`` best code rows per query, scanned without decoding."""
+        import faiss
+
+        index = faiss.clone_index(self.index)
+        # Codecs saved before the switch to inner product were built with L2
+        index.metric_type = faiss.METRIC_INNER_PRODUCT
+        faiss.copy_array_to_vector(np.ascontiguousarray(codes, dtype='uint8').ravel(), index.codes)
+        index.ntotal = len(codes)
+        return index.search(np.ascontiguousarray(queries, dtype='float32'), k)
+
+    def save(self, path: Path):
+        import faiss
+
+        faiss.write_index(self.index, str(path))
+
+    @classmethod
+    def load(cls, path: Path, mode: str) -> "VectorCodec":
+        import faiss
+
+        index = faiss.read_index(str(path))
+        return cls(mode, index.d, index=index)
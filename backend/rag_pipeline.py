@@ -1,38 +1,212 @@
-import faiss
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
 import json
 import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from embeddings import DEFAULT_EMBEDDING_MODEL, get_embedder
+from index_store import IndexSnapshot, IndexStore
+from index_migration import EmbeddingMigration
+from paper_index import PaperIndex, centroid
+from quantization import PQ_MIN_TRAINING_VECTORS, QUANTIZATION_MODES, VectorCodec
+from bm25_index import BM25Index, reciprocal_rank_fusion
+from reranker import CrossEncoderReranker
+from context_builder import ContextBuilder, CONTEXT_TOKEN_BUDGETS, DEFAULT_CONTEXT_TOKEN_BUDGET
+from chat_sessions import ChatSession
+from telemetry import record_llm_call, record_stage, span
+
 load_dotenv()
 
+# Pronouns that can only be resolved from earlier turns of a chat
+REFERENCE_WORDS = {
+    "it", "its", "this", "that", "these", "those", "they", "them", "their",
+    "he", "she", "his", "her"
+}
+
+# Words a follow-up may open with before its reference, as in "How does it ..." or "Tell me more about it"
+LEADING_WORDS = {
+    "and", "but", "so", "then", "what", "why", "how", "which", "who", "where", "when",
+    "is", "are", "was", "were", "do", "does", "did", "can", "could", "would", "should",
+    "you", "please", "tell", "me", "more", "about", "explain", "describe", "elaborate", "expand", "on"
+}
+
+# References that may also introduce a noun, as in "this paper"
+DETERMINERS = {"this", "that", "these", "those"}
+
+# Nouns after a determiner that mean the paper itself rather than an earlier turn
+PAPER_NOUNS = {"paper", "papers", "study", "work", "article", "research", "author", "authors"}
+
 class RAGPipeline:
-    def __init__(self):
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=os.getenv("OPENROUTER_API_KEY"),
+    def __init__(self, storage_dir: str = "rag_storage", load: bool = True):
+        self._client = None
+        self.model = os.getenv("LLM_MODEL", "openai/gpt-oss-20b:free")
+        self.llm_batch_concurrency = int(os.getenv("LLM_BATCH_CONCURRENCY", "4"))
+        
+        # New vectors come from this model; an index built with another one is migrated to it
+        self.embedding_model = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+        
+        # Readers use whichever snapshot is current; writers swap in a new one
+        self._snapshot = IndexSnapshot.empty(self.embedding_model)
+        self._refresh_lock = threading.Lock()
+        self._install_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        
+        # Optionally store vectors quantized, keeping exact ones on disk for re-scoring
+        self.quantization = os.getenv("EMBEDDING_QUANTIZATION", "none").lower()
+        if self.quantization not in QUANTIZATION_MODES:
+            print(f"Unknown EMBEDDING_QUANTIZATION '{self.quantization}', storing float32 vectors")
+            self.quantization = "none"
+        self.pq_subquantizers = int(os.getenv("PQ_SUBQUANTIZERS", "48"))
+        self._pq_warned_dimensions = set()
+        self.keep_exact_embeddings = os.getenv("KEEP_EXACT_EMBEDDINGS", "false").lower() == "true"
+        self.exact_rescore_factor = int(os.getenv("EXACT_RESCORE_FACTOR", "4"))
+        
+        # Fuse BM25 keyword matches with vector search results
+        self.hybrid_search = os.getenv("HYBRID_SEARCH", "true").lower() != "false"
+        self.hybrid_candidates = int(os.getenv("HYBRID_CANDIDATES", "20"))
+        
+        # Drop chunks whose cosine similarity to the question is below this before prompting
+        min_similarity = os.getenv("MIN_SIMILARITY")
+        self.min_similarity = float(min_similarity) if min_similarity else None
+        
+        # Optionally re-score a larger candidate set with a cross-encoder
+        self.reranker = None
+        if os.getenv("RERANK_ENABLED", "false").lower() == "true":
+            self.reranker = CrossEncoderReranker(
+                model_name=os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+                batch_size=int(os.getenv("RERANK_BATCH_SIZE", "32")),
+                cache_size=int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+            )
+        self.rerank_candidates = int(os.getenv("RERANK_CANDIDATES", "50"))
+        self.rerank_top_k = int(os.getenv("RERANK_TOP_K", "2"))
+        
+        # Pack the best chunks into a per-model token budget
+        self.context_candidates = int(os.getenv("CONTEXT_CANDIDATES", "8"))
+        self.context_builder = ContextBuilder(
+            token_budget=int(os.getenv(
+                "CONTEXT_TOKEN_BUDGET",
+                CONTEXT_TOKEN_BUDGETS.get(self.model, DEFAULT_CONTEXT_TOKEN_BUDGET)
+            ))
         )
         
-        self.dimension = 384  # Using a smaller dimension for free embeddings
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.documents = {}
-        self.chunks = {}
-        self.chunk_embeddings = {}
+        # Chat sessions: history beyond the token budget is summarized, follow-ups are rewritten
+        self.chat_history_tokens = int(os.getenv("CHAT_HISTORY_TOKENS", "600"))
+        self.chat_recent_turns = int(os.getenv("CHAT_RECENT_TURNS", "2"))
+        self.chat_rewrite = os.getenv("CHAT_REWRITE", "true").lower() != "false"
+        
+        # Related papers: exact search over paper vectors up to this many papers, HNSW beyond;
+        # results are cached until the next snapshot
+        self.related_ann_min_papers = int(os.getenv("RELATED_ANN_MIN_PAPERS", "5000"))
+        self.related_cache_size = int(os.getenv("RELATED_CACHE_SIZE", "1024"))
+        self._related_cache: "OrderedDict[Tuple[str, int], List[Dict]]" = OrderedDict()
+        self._related_version: Optional[str] = None
+        self._related_lock = threading.Lock()
         
         # Create storage directory
-        self.storage_dir = Path("rag_storage")
+        self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True)
         
-        # Load existing data if available
-        self._load_index()
+        # Snapshots are shared by every worker process; see IndexStore
+        self.store = IndexStore(self.storage_dir)
+        self.refresh_interval = float(os.getenv("INDEX_REFRESH_INTERVAL", "1.0"))
+        self._last_refresh_check = 0.0
+        
+        # Re-embeds the index in the background when EMBEDDING_MODEL changes
+        self.migration = EmbeddingMigration(self, batch_size=int(os.getenv("MIGRATION_BATCH_SIZE", "256")))
+        
+        # Load existing data if available; with load=False it happens in load() or on first use
+        if load:
+            self.load()
+    
+    @property
+    def client(self):
+        # The OpenAI SDK is slow to import, so the client is created on first use
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(
+                base_url=os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1"),
+                api_key=os.getenv("OPENROUTER_API_KEY"),
+            )
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+    
+    def load(self):
+        """Load the stored index once; callers arriving mid-load wait for it to finish."""
+        with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                with span("index.load"):
+                    self._load_index()
+            finally:
+                self._loaded = True
+    
+    @property
+    def dimension(self) -> int:
+        return get_embedder(self.embedding_model).dimension
+    
+    @property
+    def needs_migration(self) -> bool:
+        """Whether the live index was embedded with a different model than EMBEDDING_MODEL."""
+        snapshot = self._snapshot
+        return snapshot.version is not None and snapshot.embedding_model != self.embedding_model
+    
+    @property
+    def version(self):
+        return self._snapshot.version
+    
+    @property
+    def documents(self) -> Dict[str, str]:
+        return self._snapshot.documents
+    
+    @property
+    def chunks(self) -> Dict[str, List[str]]:
+        return self._snapshot.chunks
+    
+    @property
+    def chunk_spans(self) -> Dict[str, List[Tuple[int, int]]]:
+        return self._snapshot.chunk_spans
+    
+    @property
+    def chunk_embeddings(self) -> Dict[str, np.ndarray]:
+        return self._snapshot.chunk_embeddings
+    
+    @property
+    def bm25(self) -> BM25Index:
+        return self._snapshot.bm25
+    
+    @property
+    def codec(self) -> Optional[VectorCodec]:
+        return self._snapshot.codec
+    
+    def snapshot(self) -> IndexSnapshot:
+        """The latest consistent view of the index; safe to use from any thread."""
+        if not self._loaded:
+            self.load()
+        self._refresh()
+        return self._snapshot
     
     def _chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
         """Split text into overlapping chunks."""
-        chunks = []
+        return [text[start:end] for start, end in self._chunk_spans(text, chunk_size, overlap)]
+    
+    def _chunk_spans(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[Tuple[int, int]]:
+        """Split text into overlapping chunks, returned as (start, end) character spans."""
+        spans = []
         start = 0
         
         while start < len(text):
@@ -49,168 +223,856 @@ class RAGPipeline:
                     chunk = text[start:break_point + 1]
                     end = break_point + 1
             
-            chunks.append(chunk.strip())
+            # Record the span of the stripped chunk
+            chunk_start = start + len(chunk) - len(chunk.lstrip())
+            chunk_end = max(chunk_start, start + len(chunk.rstrip()))
+            spans.append((chunk_start, chunk_end))
             start = end - overlap
             
             if start >= len(text):
                 break
                 
-        return chunks
-    
-    def _get_embedding(self, text: str) -> np.ndarray:
-        """Get embedding for text using a simple hash-based approach for free usage."""
-        # For production, you'd use a proper embedding model
-        # This is a simplified approach for the free tier
-        import hashlib
-        
-        # Create a simple hash-based embedding
-        hash_obj = hashlib.sha256(text.encode())
-        hash_bytes = hash_obj.digest()
-        
-        # Convert to float array and normalize
-        embedding = np.frombuffer(hash_bytes[:self.dimension * 4], dtype=np.float32)
-        if len(embedding) < self.dimension:
-            # Pad with zeros if needed
-            padding = np.zeros(self.dimension - len(embedding), dtype=np.float32)
-            embedding = np.concatenate([embedding, padding])
-        else:
-            embedding = embedding[:self.dimension]
+        return spans
+    
+    def _recover_spans(self, text: str, chunks: List[str], overlap: int = 200) -> List[Tuple[int, int]]:
+        """Locate previously stored chunks in their document; (-1, -1) if not found."""
+        spans = []
+        cursor = 0
+        for chunk in chunks:
+            start = text.find(chunk, cursor)
+            if start == -1:
+                start = text.find(chunk)
+            if start == -1:
+                spans.append((-1, -1))
+                continue
+            spans.append((start, start + len(chunk)))
+            # The next chunk starts no earlier than this one's end minus the overlap
+            cursor = start + max(1, len(chunk) - overlap)
+        return spans
+    
+    def _get_embedding(self, text: str, model: Optional[str] = None) -> np.ndarray:
+        """Get the embedding for one text; see _get_embeddings."""
+        return self._get_embeddings([text], model)[0]
+    
+    def _get_embeddings(self, texts: List[str], model: Optional[str] = None) -> np.ndarray:
+        """Embed a batch of texts into a single (n, dimension) float32 matrix of unit vectors.
         
-        # Normalize
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = embedding / norm
-            
-        return embedding
+        Uses ``model`` when given (the model an index was built with), else EMBEDDING_MODEL.
+        """
+        return get_embedder(model or self.embedding_model).embed(texts)
     
     def add_document(self, paper_id: str, text: str):
         """Add a document to the RAG pipeline."""
-        # Chunk the document
-        chunks = self._chunk_text(text)
+        self.add_documents({paper_id: text})
+    
+    def add_documents(self, documents: Dict[str, str]):
+        """Add several documents with one embedding batch and one index commit."""
+        if not documents:
+            return
         
-        # Store document and chunks
-        self.documents[paper_id] = text
-        self.chunks[paper_id] = chunks
+        # Chunk every document up front so all chunks are embedded together
+        with span("index.chunk"):
+            spans = {paper_id: self._chunk_spans(text) for paper_id, text in documents.items()}
+            chunked = {
+                paper_id: [documents[paper_id][start:end] for start, end in paper_spans]
+                for paper_id, paper_spans in spans.items()
+            }
+            all_chunks = [chunk for chunks in chunked.values() for chunk in chunks]
         
-        # Generate embeddings for chunks
-        embeddings = []
-        for chunk in chunks:
-            embedding = self._get_embedding(chunk)
-            embeddings.append(embedding)
+        if not self._loaded:
+            self.load()
+        
+        # Embed with the live index's model, which differs from EMBEDDING_MODEL mid-migration
+        model = self._snapshot.embedding_model
+        with span("index.embed"):
+            embeddings = self._get_embeddings(all_chunks, model)
+        
+        wait_start = time.perf_counter()
+        with self.store.writer_lock():
+            record_stage("index.lock_wait", time.perf_counter() - wait_start)
+            
+            # Build on the latest snapshot so other workers' papers are kept
+            with span("index.merge"):
+                self._refresh(force=True)
+                if self._snapshot.embedding_model != model:
+                    # A migration cut over while these chunks were being embedded
+                    embeddings = self._get_embeddings(all_chunks, self._snapshot.embedding_model)
+                snapshot = self._apply_documents(self._snapshot, documents, chunked, spans, embeddings)
+            
+            # Save the updated index once for the whole batch, then let readers see it
+            with span("index.save"):
+                self._install(self._save_index(snapshot))
+    
+    def _install(self, snapshot: IndexSnapshot):
+        """Make a snapshot current unless a newer one already is."""
+        with self._install_lock:
+            current = self._snapshot.version
+            # Versions are zero-padded, so they order as strings
+            if current is None or snapshot.version > current:
+                self._snapshot = snapshot
+    
+    def _apply_documents(
+        self,
+        base: IndexSnapshot,
+        documents: Dict[str, str],
+        chunked: Dict[str, List[str]],
+        spans: Dict[str, List[Tuple[int, int]]],
+        embeddings: np.ndarray
+    ) -> IndexSnapshot:
+        """Return a copy of ``base`` with the chunked and embedded documents merged in."""
+        # Copy-on-write: readers may still be using base
+        merged = base.replace(
+            documents=dict(base.documents),
+            chunks=dict(base.chunks),
+            chunk_spans=dict(base.chunk_spans),
+            chunk_embeddings=dict(base.chunk_embeddings),
+            exact_embeddings=dict(base.exact_embeddings),
+            bm25=base.bm25.copy()
+        )
+        
+        centroids = {}
+        offset = 0
+        for paper_id, chunks in chunked.items():
+            # Store document and chunks
+            merged.documents[paper_id] = documents[paper_id]
+            merged.chunks[paper_id] = chunks
+            merged.chunk_spans[paper_id] = spans[paper_id]
+            paper_embeddings = embeddings[offset:offset + len(chunks)]
+            if merged.codec is None:
+                merged.chunk_embeddings[paper_id] = paper_embeddings
+            else:
+                # Keep the exact vectors too, in case _save_index switches codecs
+                merged.chunk_embeddings[paper_id] = merged.codec.encode(paper_embeddings)
+                merged.exact_embeddings[paper_id] = paper_embeddings
+            merged.bm25.add(paper_id, chunks)
+            centroids[paper_id] = centroid(paper_embeddings)
+            offset += len(chunks)
+        
+        # Only the new papers' vectors are computed; the rest are shared with base
+        merged.paper_index = base.paper_index.with_papers(centroids)
+        return merged
+    
+    def _select_codec(self, current: Optional[VectorCodec], count: int, dimension: int) -> Optional[VectorCodec]:
+        """The codec for the next snapshot of ``count`` vectors; ``current`` if it still applies."""
+        if current is not None and current.dimension != dimension:
+            current = None
+        if current is not None and current.mode == self.quantization:
+            return current
+        mode = self.quantization
+        if mode == "pq" and dimension % self.pq_subquantizers:
+            # PQ splits each vector into equal sub-vectors; int8 works for any dimension
+            if dimension not in self._pq_warned_dimensions:
+                self._pq_warned_dimensions.add(dimension)
+                print(f"PQ_SUBQUANTIZERS ({self.pq_subquantizers}) does not divide the embedding dimension ({dimension}), storing int8 codes instead")
+            mode = "int8"
+        if mode == "pq" and count < PQ_MIN_TRAINING_VECTORS:
+            # Too few vectors to train PQ codebooks; use int8 until there are enough
+            mode = "int8"
+        if mode == "none":
+            return None
+        if current is not None and current.mode == mode:
+            return current
+        return VectorCodec(mode, dimension, self.pq_subquantizers)
+    
+    def _exact_vectors(self, snapshot: IndexSnapshot, paper_id: str) -> np.ndarray:
+        """A paper's most precise float32 vectors: the exact copy if kept, else the stored ones."""
+        exact = snapshot.exact_embeddings.get(paper_id)
+        if exact is not None:
+            return exact
+        return snapshot.vectors(paper_id)
+    
+    def _save_index(self, snapshot: IndexSnapshot) -> IndexSnapshot:
+        """Publish a snapshot to disk; requires the writer lock.
+        
+        Returns the snapshot with its version filled in and its vectors
+        memory-mapped from the published files.
+        """
+        paper_ids = list(snapshot.chunks.keys())
+        paper_offsets = {}
+        offset = 0
+        for paper_id in paper_ids:
+            count = len(snapshot.chunks[paper_id])
+            paper_offsets[paper_id] = [offset, offset + count]
+            offset += count
+        
+        def concatenate(arrays: List[np.ndarray], width: int, dtype: str) -> np.ndarray:
+            if not arrays:
+                return np.zeros((0, width), dtype=dtype)
+            return np.concatenate([np.asarray(a, dtype=dtype).reshape(-1, width) for a in arrays])
         
-        embeddings = np.array(embeddings).astype('float32')
-        self.chunk_embeddings[paper_id] = embeddings
+        dimension = get_embedder(snapshot.embedding_model).dimension
+        codec = self._select_codec(snapshot.codec, offset, dimension)
+        exact = None
+        if codec is not None and codec is snapshot.codec:
+            stored = concatenate([snapshot.chunk_embeddings[p] for p in paper_ids], codec.code_size, 'uint8')
+        else:
+            # New or changed codec: (re)encode every vector from the best copy we have
+            exact = concatenate([self._exact_vectors(snapshot, p) for p in paper_ids], dimension, 'float32')
+            if codec is None:
+                stored = exact
+            else:
+                codec.train(exact)
+                stored = codec.encode(exact)
+        
+        if codec is not None and self.keep_exact_embeddings and exact is None:
+            exact = concatenate([self._exact_vectors(snapshot, p) for p in paper_ids], dimension, 'float32')
+        
+        # Papers without a vector yet (converted or migrated indexes) get one from their chunks.
+        # The related-papers graph is extended on a copy, so a failed publish leaves the shared one as it was
+        paper_index = self._complete_paper_index(snapshot, paper_ids).with_graph_copy(self.related_ann_min_papers)
+        
+        def write(path: Path):
+            # Vectors go in .npy files so readers can memory-map them
+            if codec is None:
+                np.save(path / "embeddings.npy", stored)
+            else:
+                np.save(path / "codes.npy", stored)
+                codec.save(path / "codec.faiss")
+                if self.keep_exact_embeddings:
+                    np.save(path / "embeddings.npy", exact)
+            
+            # Record how the vectors were made, so a different model is never mixed in
+            self.store.write_manifest(
+                path,
+                embedding_model=snapshot.embedding_model,
+                dimension=dimension,
+                quantization=codec.mode if codec is not None else "none",
+                papers=len(paper_ids),
+                chunks=offset
+            )
+            
+            # Save metadata
+            metadata = {
+                "documents": snapshot.documents,
+                "chunks": snapshot.chunks,
+                "chunk_spans": snapshot.chunk_spans,
+                "paper_offsets": paper_offsets
+            }
+            with open(path / "metadata.json", "w") as f:
+                json.dump(metadata, f)
+            
+            # Save BM25 postings and paper vectors
+            snapshot.bm25.save(path / "bm25.pkl")
+            paper_index.save(path, self.related_ann_min_papers)
         
-        # Add to FAISS index
-        self.index.add(embeddings)
+        version = self.store.publish(write)
         
-        # Save the updated index
-        self._save_index()
+        # Map the vectors back from disk rather than keeping a second copy in memory
+        chunk_embeddings, exact_embeddings = self._map_vectors(self.store.snapshot_path(version), paper_offsets, codec)
+        return snapshot.replace(
+            version=version,
+            codec=codec,
+            chunk_embeddings=chunk_embeddings,
+            exact_embeddings=exact_embeddings,
+            paper_index=paper_index
+        )
+    
+    def _complete_paper_index(self, snapshot: IndexSnapshot, paper_ids: List[str]) -> PaperIndex:
+        """The snapshot's paper index with vectors added for any papers it lacks."""
+        missing = [paper_id for paper_id in paper_ids if paper_id not in snapshot.paper_index]
+        return snapshot.paper_index.with_papers({
+            paper_id: centroid(self._exact_vectors(snapshot, paper_id)) for paper_id in missing
+        })
     
-    def _save_index(self):
-        """Save the FAISS index and metadata."""
-        # Save FAISS index
-        faiss.write_index(self.index, str(self.storage_dir / "faiss.index"))
+    def _map_vectors(
+        self,
+        path: Path,
+        paper_offsets: Dict[str, List[int]],
+        codec: Optional[VectorCodec]
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Memory-map a snapshot's stored and exact vectors, split per paper."""
+        def split(name: str) -> Dict[str, np.ndarray]:
+            file = path / name
+            if not paper_offsets or not file.exists():
+                return {}
+            # Pages of the vector files are shared between workers through the OS page cache
+            vectors = np.load(file, mmap_mode="r")
+            return {k: vectors[start:end] for k, (start, end) in paper_offsets.items()}
         
-        # Save metadata
-        metadata = {
-            "documents": self.documents,
-            "chunks": self.chunks,
-            "chunk_embeddings": {k: v.tolist() for k, v in self.chunk_embeddings.items()}
-        }
+        if codec is None:
+            return split("embeddings.npy"), {}
+        return split("codes.npy"), split("embeddings.npy")
+    
+    def _refresh(self, force: bool = False):
+        """Pick up snapshots published by other worker processes."""
+        now = time.monotonic()
+        if not force and now - self._last_refresh_check < self.refresh_interval:
+            return
         
-        with open(self.storage_dir / "metadata.json", "w") as f:
-            json.dump(metadata, f, indent=2)
+        # One thread reloads; the others keep serving the snapshot they already have
+        if not self._refresh_lock.acquire(blocking=force):
+            return
+        try:
+            self._last_refresh_check = now
+            version = self.store.current_version()
+            if version is not None and version != self._snapshot.version:
+                self._load_snapshot(version)
+        finally:
+            self._refresh_lock.release()
     
     def _load_index(self):
-        """Load the FAISS index and metadata."""
+        """Load the live snapshot, or convert an index from before snapshots existed."""
+        version = self.store.current_version()
+        if version is None:
+            self._load_legacy_index()
+        else:
+            self._load_snapshot(version)
+    
+    def _load_snapshot(self, version: str):
+        """Load a published snapshot, memory-mapping its vectors, and make it current."""
+        path = self.store.snapshot_path(version)
+        try:
+            # Load metadata
+            with open(path / "metadata.json", "r") as f:
+                metadata = json.load(f)
+            
+            # Snapshots from before quantization only have embeddings.npy
+            manifest = self.store.read_manifest(version)
+            mode = manifest.get("quantization", metadata.get("quantization", "none"))
+            codec = VectorCodec.load(path / "codec.faiss", mode) if mode != "none" else None
+            chunk_embeddings, exact_embeddings = self._map_vectors(path, metadata.get("paper_offsets", {}), codec)
+            
+            # Queries against this snapshot must be embedded with the model it was built with
+            embedding_model = manifest.get("embedding_model", DEFAULT_EMBEDDING_MODEL)
+            dimension = get_embedder(embedding_model).dimension
+            if manifest.get("dimension", dimension) != dimension:
+                raise ValueError(
+                    f"snapshot has {manifest['dimension']}-dimensional vectors but {embedding_model} makes {dimension}"
+                )
+            
+            bm25 = BM25Index()
+            bm25.load(path / "bm25.pkl")
+            
+            snapshot = IndexSnapshot(
+                version=version,
+                codec=codec,
+                documents=metadata.get("documents", {}),
+                chunks=metadata.get("chunks", {}),
+                chunk_spans={
+                    k: [tuple(span) for span in v]
+                    for k, v in metadata.get("chunk_spans", {}).items()
+                },
+                chunk_embeddings=chunk_embeddings,
+                exact_embeddings=exact_embeddings,
+                bm25=bm25,
+                embedding_model=embedding_model,
+                paper_index=PaperIndex.load(path)
+            )
+            if len(snapshot.paper_index) < len(snapshot.chunks):
+                # Saved before paper vectors existed: average the chunk vectors once here
+                snapshot = snapshot.replace(paper_index=self._complete_paper_index(snapshot, list(snapshot.chunks)))
+            self._install(snapshot)
+        except Exception as e:
+            # Keep serving the snapshot we already have
+            print(f"Error loading index snapshot {version}: {e}")
+    
+    def _load_legacy_index(self):
+        """Load an index saved before snapshots existed and convert it."""
         index_path = self.storage_dir / "faiss.index"
         metadata_path = self.storage_dir / "metadata.json"
         
         if index_path.exists() and metadata_path.exists():
             try:
-                # Load FAISS index
-                self.index = faiss.read_index(str(index_path))
-                
                 # Load metadata
                 with open(metadata_path, "r") as f:
                     metadata = json.load(f)
                 
-                self.documents = metadata.get("documents", {})
-                self.chunks = metadata.get("chunks", {})
-                self.chunk_embeddings = {
+                documents = metadata.get("documents", {})
+                chunks = metadata.get("chunks", {})
+                chunk_spans = {
+                    k: [tuple(span) for span in v]
+                    for k, v in metadata.get("chunk_spans", {}).items()
+                }
+                chunk_embeddings = {
                     k: np.array(v, dtype='float32') 
                     for k, v in metadata.get("chunk_embeddings", {}).items()
                 }
+                
+                # Load BM25 postings, rebuilding them for indexes saved before they existed
+                bm25 = BM25Index()
+                bm25_path = self.storage_dir / "bm25.pkl"
+                if bm25_path.exists():
+                    bm25.load(bm25_path)
+                for paper_id, paper_chunks in chunks.items():
+                    if paper_id not in bm25.papers:
+                        bm25.add(paper_id, paper_chunks)
+                    if paper_id not in chunk_spans:
+                        chunk_spans[paper_id] = self._recover_spans(documents.get(paper_id, ""), paper_chunks)
+                
+                snapshot = IndexSnapshot(None, None, documents, chunks, chunk_spans, chunk_embeddings, {}, bm25)
+                
+                # Publish as the first snapshot unless another worker already did
+                with self.store.writer_lock():
+                    if self.store.current_version() is None:
+                        self._install(self._save_index(snapshot))
+                    else:
+                        self._load_index()
             except Exception as e:
                 print(f"Error loading index: {e}")
                 # Reset if loading fails
-                self.index = faiss.IndexFlatL2(self.dimension)
-                self.documents = {}
-                self.chunks = {}
-                self.chunk_embeddings = {}
+                self._snapshot = IndexSnapshot.empty(self.embedding_model)
+    
+    def _vector_search_batch(
+        self,
+        snapshot: IndexSnapshot,
+        paper_id: str,
+        query_embeddings: np.ndarray,
+        top_k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Return (chunk index, cosine similarity) pairs for each query from one embedding search."""
+        import faiss
+        
+        # Get embeddings for this paper's chunks
+        paper_embeddings = snapshot.chunk_embeddings[paper_id]
+        num_chunks = len(snapshot.chunks[paper_id])
+        
+        if snapshot.codec is None:
+            # Create a temporary index for this paper
+            temp_index = faiss.IndexFlatIP(query_embeddings.shape[1])
+            temp_index.add(paper_embeddings)
+            
+            # Search for similar chunks for all queries at once
+            similarities, indices = temp_index.search(query_embeddings, min(top_k, num_chunks))
+        else:
+            # Scan the compact codes, over-fetching when exact vectors can re-score the candidates
+            exact = snapshot.exact_embeddings.get(paper_id)
+            k = top_k * self.exact_rescore_factor if exact is not None else top_k
+            similarities, indices = snapshot.codec.search(paper_embeddings, query_embeddings, min(k, num_chunks))
+            if exact is not None:
+                similarities, indices = self._rescore_exact(exact, query_embeddings, indices, top_k)
+        
+        return [
+            [
+                (int(idx), float(similarity))
+                for idx, similarity in zip(row_indices, row_similarities)
+                if 0 <= idx < num_chunks
+            ]
+            for row_indices, row_similarities in zip(indices, similarities)
+        ]
+    
+    def _rescore_exact(
+        self,
+        exact: np.ndarray,
+        query_embeddings: np.ndarray,
+        indices: np.ndarray,
+        top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-rank approximate candidates by exact inner product, reading only their rows."""
+        all_similarities = []
+        all_indices = []
+        for query, row in zip(query_embeddings, indices):
+            candidates = row[row >= 0]
+            similarities = np.asarray(exact[candidates]) @ query
+            order = np.argsort(-similarities, kind="stable")[:top_k]
+            all_similarities.append(similarities[order])
+            all_indices.append(candidates[order])
+        return all_similarities, all_indices
+    
+    def _similarities(
+        self,
+        snapshot: IndexSnapshot,
+        paper_id: str,
+        query_embedding: np.ndarray,
+        indices: List[int]
+    ) -> np.ndarray:
+        """Cosine similarity of a query to some of a paper's chunks, from the most precise vectors kept."""
+        if not indices:
+            return np.zeros(0, dtype='float32')
+        rows = np.asarray(indices)
+        exact = snapshot.exact_embeddings.get(paper_id)
+        if exact is not None:
+            vectors = np.asarray(exact[rows])
+        elif snapshot.codec is not None:
+            vectors = snapshot.codec.decode(snapshot.chunk_embeddings[paper_id][rows])
+        else:
+            vectors = np.asarray(snapshot.chunk_embeddings[paper_id][rows])
+        return vectors @ query_embedding
+    
+    def _search_chunks_batch(
+        self,
+        snapshot: IndexSnapshot,
+        paper_id: str,
+        queries: List[str],
+        query_embeddings: np.ndarray,
+        top_k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Rank (chunk index, score) pairs per query, fusing vector and BM25 results when enabled.
+        
+        Higher scores are better: cosine similarity for vector-only search,
+        the reciprocal-rank fusion score otherwise.
+        """
+        if not self.hybrid_search:
+            with span("query.vector_search"):
+                return self._vector_search_batch(snapshot, paper_id, query_embeddings, top_k)
+        
+        candidates = max(top_k, self.hybrid_candidates)
+        with span("query.vector_search"):
+            vector_rankings = self._vector_search_batch(snapshot, paper_id, query_embeddings, candidates)
+        
+        results = []
+        for query, vector_hits in zip(queries, vector_rankings):
+            with span("query.bm25"):
+                keyword_hits = snapshot.bm25.search(paper_id, query, candidates)
+            fused = reciprocal_rank_fusion([
+                [idx for idx, _ in vector_hits],
+                [idx for idx, _ in keyword_hits]
+            ])
+            results.append(fused[:top_k])
+        return results
+    
+    def _rank_chunks_batch(
+        self,
+        snapshot: IndexSnapshot,
+        paper_id: str,
+        queries: List[str],
+        query_embeddings: np.ndarray,
+        top_k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Return the best (chunk index, score) pairs per query, re-ranked when enabled."""
+        if paper_id not in snapshot.chunks:
+            return [[] for _ in queries]
+        
+        if self.reranker is None:
+            return self._search_chunks_batch(snapshot, paper_id, queries, query_embeddings, top_k)
+        
+        # Retrieve a wide candidate set and let the cross-encoder pick the best
+        chunks = snapshot.chunks[paper_id]
+        candidate_lists = self._search_chunks_batch(
+            snapshot, paper_id, queries, query_embeddings, max(top_k, self.rerank_candidates)
+        )
+        results = []
+        for query, candidates in zip(queries, candidate_lists):
+            with span("query.rerank"):
+                ranked = self.reranker.rerank(
+                    query,
+                    [(f"{paper_id}:{idx}", chunks[idx]) for idx, _ in candidates],
+                    top_k
+                )
+            results.append([(int(chunk_id.rsplit(":", 1)[1]), score) for chunk_id, score in ranked])
+        return results
+    
+    def _rank_queries(
+        self,
+        snapshot: IndexSnapshot,
+        queries: List[Tuple[str, str]],
+        top_k: int,
+        min_similarity: Optional[float] = None
+    ) -> List[Optional[List[Tuple[int, float, float]]]]:
+        """Rank chunks for many (paper_id, query) pairs; None for unknown papers.
+        
+        Each hit is (chunk index, ranking score, cosine similarity). Hits below
+        ``min_similarity`` are dropped. All queries are embedded together, and
+        each paper is searched once for all of the queries that target it.
+        """
+        with span("query.embed"):
+            query_embeddings = self._get_embeddings([query for _, query in queries], snapshot.embedding_model)
+        
+        by_paper: Dict[str, List[int]] = {}
+        for position, (paper_id, _) in enumerate(queries):
+            if paper_id in snapshot.chunks:
+                by_paper.setdefault(paper_id, []).append(position)
+        
+        results: List[Optional[List[Tuple[int, float, float]]]] = [None] * len(queries)
+        for paper_id, positions in by_paper.items():
+            ranked = self._rank_chunks_batch(
+                snapshot,
+                paper_id,
+                [queries[position][1] for position in positions],
+                query_embeddings[positions],
+                top_k
+            )
+            for position, hits in zip(positions, ranked):
+                similarities = self._similarities(
+                    snapshot, paper_id, query_embeddings[position], [idx for idx, _ in hits]
+                )
+                results[position] = [
+                    (idx, score, float(similarity))
+                    for (idx, score), similarity in zip(hits, similarities)
+                    if min_similarity is None or similarity >= min_similarity
+                ]
+        return results
+    
+    def _rank_chunks(
+        self,
+        snapshot: IndexSnapshot,
+        paper_id: str,
+        query: str,
+        top_k: int,
+        min_similarity: Optional[float] = None
+    ) -> List[int]:
+        """Return the best chunk indices for a query, re-ranked when enabled."""
+        ranked = self._rank_queries(snapshot, [(paper_id, query)], top_k, min_similarity)[0]
+        return [idx for idx, _, _ in ranked or []]
     
     def _find_relevant_chunks(self, paper_id: str, query: str, top_k: int = 3) -> List[str]:
-        """Find the most relevant chunks for a query."""
-        if paper_id not in self.chunks:
+        """Find the most relevant chunks for a query, skipping any below the similarity cutoff."""
+        snapshot = self.snapshot()
+        if paper_id not in snapshot.chunks:
             return []
         
-        query_embedding = self._get_embedding(query).reshape(1, -1)
+        ranked = self._rank_chunks(snapshot, paper_id, query, top_k, self.min_similarity)
+        return [snapshot.chunks[paper_id][idx] for idx in ranked]
+    
+    def retrieve(
+        self,
+        paper_id: str,
+        query: str,
+        top_k: int = 3,
+        min_similarity: Optional[float] = None
+    ) -> List[Dict]:
+        """Retrieve the best chunks for one query without calling the LLM; see retrieve_batch."""
+        return self.retrieve_batch([(paper_id, query)], top_k, min_similarity)[0]
+    
+    def retrieve_batch(
+        self,
+        queries: List[Tuple[str, str]],
+        top_k: int = 3,
+        min_similarity: Optional[float] = None
+    ) -> List[List[Dict]]:
+        """Retrieve the best chunks for many (paper_id, query) pairs without calling the LLM.
         
-        # Get embeddings for this paper's chunks
-        paper_embeddings = self.chunk_embeddings[paper_id]
+        Returns one list per query, best first, of dicts with ``chunk_id``
+        ("paper_id:index"), ``paper_id``, ``chunk_index``, ``score`` (the
+        ranking score), ``similarity`` (cosine) and ``text``. Chunks below
+        ``min_similarity`` are left out.
+        """
+        snapshot = self.snapshot()
+        results = []
+        for (paper_id, _), hits in zip(queries, self._rank_queries(snapshot, queries, top_k, min_similarity)):
+            chunks = snapshot.chunks.get(paper_id, [])
+            results.append([
+                {
+                    "chunk_id": f"{paper_id}:{idx}",
+                    "paper_id": paper_id,
+                    "chunk_index": idx,
+                    "score": float(score),
+                    "similarity": similarity,
+                    "text": chunks[idx]
+                }
+                for idx, score, similarity in hits or []
+            ])
+        return results
+    
+    def related_papers(self, paper_id: str, top_k: int = 5) -> List[Dict]:
+        """The papers most similar to ``paper_id`` overall, best first.
         
-        # Create a temporary index for this paper
-        temp_index = faiss.IndexFlatL2(self.dimension)
-        temp_index.add(paper_embeddings)
+        Returns dicts with ``paper_id`` and ``similarity`` (cosine of the papers'
+        average chunk vectors). Raises KeyError for a paper that is not indexed.
+        """
+        snapshot = self.snapshot()
+        if paper_id not in snapshot.chunks:
+            raise KeyError(paper_id)
         
-        # Search for similar chunks
-        distances, indices = temp_index.search(query_embedding, min(top_k, len(self.chunks[paper_id])))
+        key = (paper_id, top_k)
+        with self._related_lock:
+            # New papers can change anyone's neighbours, so a newer snapshot empties the cache
+            if self._related_version is None or snapshot.version > self._related_version:
+                self._related_cache.clear()
+                self._related_version = snapshot.version
+            cached = self._related_cache.get(key) if snapshot.version == self._related_version else None
+            if cached is not None:
+                self._related_cache.move_to_end(key)
+                return [dict(paper) for paper in cached]
         
-        # Return the relevant chunks
-        relevant_chunks = []
-        for idx in indices[0]:
-            if idx < len(self.chunks[paper_id]):
-                relevant_chunks.append(self.chunks[paper_id][idx])
+        with span("related.search"):
+            related = [
+                {"paper_id": other, "similarity": similarity}
+                for other, similarity in snapshot.paper_index.search(paper_id, top_k, self.related_ann_min_papers)
+            ]
         
-        return relevant_chunks
+        with self._related_lock:
+            if snapshot.version == self._related_version:
+                self._related_cache[key] = related
+                while len(self._related_cache) > self.related_cache_size:
+                    self._related_cache.popitem(last=False)
+        return [dict(paper) for paper in related]
+    
+    def _assemble_context(self, snapshot: IndexSnapshot, paper_id: str, ranked: List[int]) -> str:
+        """Pack ranked chunks into prompt context within the token budget."""
+        with span("query.context"):
+            return self._pack_context(snapshot, paper_id, ranked)
+    
+    def _pack_context(self, snapshot: IndexSnapshot, paper_id: str, ranked: List[int]) -> str:
+        chunks = snapshot.chunks[paper_id]
+        spans = snapshot.chunk_spans.get(paper_id, [])
+        candidates = [
+            (chunks[idx], spans[idx] if idx < len(spans) else (-1, -1))
+            for idx in ranked
+        ]
+        return self.context_builder.build(snapshot.documents[paper_id], candidates)
+    
+    def _context_top_k(self) -> int:
+        return self.rerank_top_k if self.reranker is not None else self.context_candidates
+    
+    def _build_context(self, snapshot: IndexSnapshot, paper_id: str, query: str) -> str:
+        """Assemble prompt context from the best chunks within the token budget."""
+        ranked = self._rank_chunks(snapshot, paper_id, query, self._context_top_k(), self.min_similarity)
+        return self._assemble_context(snapshot, paper_id, ranked)
+    
+    def _build_prompt(self, context: str, query: str, history: str = "") -> str:
+        if history:
+            history = f"""
+Conversation so far:
+{history}
+"""
+        return f"""Based on the following context from a research paper, please answer the question.
+
+Context:
+{context}
+{history}
+Question: {query}
+
+Please provide a comprehensive answer based only on the information provided in the context. If the context doesn't contain enough information to answer the question, please say so."""
+    
+    def _complete(self, prompt: str, operation: str) -> str:
+        """Send a prompt to the LLM and return its reply; raises if the call fails."""
+        try:
+            with span(f"llm.{operation}"):
+                completion = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    extra_headers={
+                        "HTTP-Referer": "http://localhost:3000",
+                        "X-Title": "ResearchRAG",
+                    }
+                )
+        except Exception:
+            record_llm_call(self.model, operation, error=True)
+            raise
+        record_llm_call(self.model, operation, completion)
+        # Some providers send no content at all, e.g. for a filtered reply
+        return completion.choices[0].message.content or ""
+    
+    def _generate(self, prompt: str) -> str:
+        """Send a prompt to the LLM and return its answer, or an error message."""
+        try:
+            return self._complete(prompt, "answer")
+        except Exception as e:
+            return f"Error generating response: {str(e)}"
     
     def query(self, paper_id: str, query: str) -> str:
         """Query the RAG pipeline for a specific paper."""
-        if paper_id not in self.documents:
+        snapshot = self.snapshot()
+        if paper_id not in snapshot.documents:
             return "Paper not found in the system."
         
-        # Find relevant chunks
-        relevant_chunks = self._find_relevant_chunks(paper_id, query)
+        # Pack the most relevant chunks into the prompt budget
+        context = self._build_context(snapshot, paper_id, query)
         
-        if not relevant_chunks:
+        if not context:
             return "No relevant information found for your query."
         
-        # Prepare context
-        context = "\n\n".join(relevant_chunks)
+        return self._generate(self._build_prompt(context, query))
+    
+    def chat(self, paper_id: str, query: str, session: ChatSession) -> str:
+        """Answer a question in a conversation, using and then extending the session's history."""
+        snapshot = self.snapshot()
+        if paper_id not in snapshot.documents:
+            return "Paper not found in the system."
+        
+        with session.lock:
+            # Retrieve with a standalone version of the question, but answer the question as asked
+            context = self._build_context(snapshot, paper_id, self._rewrite_query(session, query))
+            if not context:
+                return "No relevant information found for your query."
+            
+            try:
+                answer = self._complete(self._build_prompt(context, query, session.history()), "answer")
+            except Exception as e:
+                return f"Error generating response: {str(e)}"
+            
+            session.add_turn(query, answer)
+            self._compact_history(session)
+        return answer
+    
+    def _is_follow_up(self, query: str) -> bool:
+        """Whether a question opens with a reference to earlier turns ("And them?", "How does it ...")."""
+        words = [word.strip("?.,!;:'\"").lower() for word in query.split()]
+        if words[:1] in (["and"], ["also"]) or words[:2] in (["what", "about"], ["how", "about"]):
+            return True
+        for i, word in enumerate(words):
+            if word in REFERENCE_WORDS:
+                if word in DETERMINERS and i + 1 < len(words):
+                    return words[i + 1] not in PAPER_NOUNS
+                return True
+            if word not in LEADING_WORDS:
+                return False
+        return False
+    
+    def _rewrite_query(self, session: ChatSession, query: str) -> str:
+        """Turn a follow-up question into a standalone retrieval query."""
+        if session.is_empty or not self.chat_rewrite or not self._is_follow_up(query):
+            return query
         
-        # Create prompt
-        prompt = f"""Based on the following context from a research paper, please answer the question.
-
-Context:
-{context}
+        prompt = f"""Rewrite the user's latest question about a research paper as a standalone search query, resolving references to the conversation. Reply with the query only.
 
-Question: {query}
+Conversation:
+{session.history()}
 
-Please provide a comprehensive answer based only on the information provided in the context. If the context doesn't contain enough information to answer the question, please say so."""
+Latest question: {query}"""
+        try:
+            rewritten = self._complete(prompt, "rewrite").strip().strip('"')
+        except Exception as e:
+            print(f"Error rewriting follow-up question: {e}")
+            rewritten = ""
+        
+        if rewritten:
+            return rewritten[:500]
+        # Fall back to the previous question, which usually names the topic
+        return f"{session.turns[-1][0]} {query}" if session.turns else query
+    
+    def _compact_history(self, session: ChatSession):
+        """Fold turns older than the most recent ones into the summary once over the token budget."""
+        if session.history_tokens() <= self.chat_history_tokens:
+            return
+        # Fold at least as many turns as are kept, so summaries are not re-written every turn
+        count = len(session.turns) - self.chat_recent_turns
+        if count < max(1, self.chat_recent_turns):
+            return
+        
+        old_turns = session.format_turns(session.turns[:count])
+        max_chars = self.chat_history_tokens * 2
+        prompt = f"""Summarize this conversation about a research paper in at most {max_chars // 6} words, keeping the facts and topics a follow-up question might refer to.
 
+{f"Earlier summary: {session.summary}" if session.summary else ""}
+{old_turns}"""
         try:
-            # Get response from LLM
-            completion = self.client.chat.completions.create(
-                model="openai/gpt-oss-20b:free",
-                messages=[{"role": "user", "content": prompt}],
-                extra_headers={
-                    "HTTP-Referer": "http://localhost:3000",
-                    "X-Title": "ResearchRAG",
-                }
-            )
-            
-            return completion.choices[0].message.content
-            
+            summary = self._complete(prompt, "history_summary").strip()
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            print(f"Error summarizing chat history: {e}")
+            summary = f"{session.summary}\n{old_turns}".strip()
+        
+        # Keep the end of an over-long summary, which covers the latest turns
+        session.fold(count, summary[-max_chars:])
+    
+    def query_batch(self, queries: List[Tuple[str, str]], max_concurrency: Optional[int] = None) -> List[str]:
+        """Answer many (paper_id, query) pairs; results are in input order.
+        
+        Retrieval for the whole batch runs together, then at most
+        ``max_concurrency`` LLM calls are in flight at once.
+        """
+        if not queries:
+            return []
+        
+        snapshot = self.snapshot()
+        ranked = self._rank_queries(snapshot, queries, self._context_top_k(), self.min_similarity)
+        
+        answers: List[Optional[str]] = [None] * len(queries)
+        prompts = {}
+        for position, ((paper_id, query), hits) in enumerate(zip(queries, ranked)):
+            if paper_id not in snapshot.documents:
+                answers[position] = "Paper not found in the system."
+                continue
+            context = self._assemble_context(snapshot, paper_id, [idx for idx, _, _ in hits or []])
+            if not context:
+                answers[position] = "No relevant information found for your query."
+                continue
+            prompts[position] = self._build_prompt(context, query)
+        
+        if prompts:
+            workers = min(max_concurrency or self.llm_batch_concurrency, len(prompts))
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                for position, answer in zip(prompts, pool.map(self._generate, prompts.values())):
+                    answers[position] = answer
+        
+        return answers
@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+class CrossEncoderReranker:
+    """Re-scores retrieved chunks with a local CPU cross-encoder.
+
+    The model comes from the optional ``sentence-transformers`` package and is
+    loaded on first use. Scores are cached per (query, chunk_id) so repeated
+    questions only pay for chunks that have not been scored yet.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        batch_size: int = 32,
+        cache_size: int = 10000
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._model = None
+        self._load_failed = False
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None and not self._load_failed:
+            with self._lock:
+                if self._model is None and not self._load_failed:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                        self._model = CrossEncoder(self.model_name, device="cpu")
+                    except Exception as e:
+                        print(f"Cross-encoder unavailable, skipping re-ranking: {e}")
+                        self._load_failed = True
+        return self._model
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[float]:
+        with self._lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _cache_put(self, key: Tuple[str, str], score: float):
+        with self._lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(self, query: str, candidates: List[Tuple[str, str]], top_k: int) -> List[Tuple[str, float]]:
+        """Order (chunk_id, text) candidates by cross-encoder score.
+
+        Returns the best ``top_k`` as (chunk_id, score) pairs. If the model
+        cannot be loaded, the incoming order is kept.
+        """
+        model = self._get_model()
+        if model is None:
+            return [(chunk_id, 0.0) for chunk_id, _ in candidates[:top_k]]
+
+        scores = {}
+        missing = []
+        for chunk_id, text in candidates:
+            score = self._cache_get((query, chunk_id))
+            if score is None:
+                missing.append((chunk_id, text))
+            else:
+                scores[chunk_id] = score
+
+        if missing:
+            predicted = model.predict(
+                [(query, text) for _, text in missing],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            )
+            for (chunk_id, _), score in zip(missing, predicted):
+                scores[chunk_id] = float(score)
+                self._cache_put((query, chunk_id), float(score))
+
+        ranked = sorted(
+            ((chunk_id, scores[chunk_id]) for chunk_id, _ in candidates),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        return ranked[:top_k]
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the ResearchRAG backend.
+
+Builds a synthetic index, then measures in fresh processes how long it takes
+to import the app, to load the index, and for a real server to answer "/"
+(first response) and to report ready. Thresholds make it usable in CI:
+
+    python startup_benchmark.py --papers 200 --runs 3
+    python startup_benchmark.py --max-import-seconds 1.5 --max-ready-seconds 5
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+IMPORT_PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.rag_pipeline.load()
+loaded = time.perf_counter()
+print(json.dumps({"import_seconds": imported - start, "load_seconds": loaded - imported}))
+"""
+
+def build_index(workdir: Path, papers: int, pages: int):
+    """Index a synthetic corpus into workdir/rag_storage, as the app would find it."""
+    from bench.corpus import generate_corpus
+    from rag_pipeline import RAGPipeline
+
+    corpus = generate_corpus(papers, pages, queries_per_paper=0)
+    pipeline = RAGPipeline(storage_dir=str(workdir / "rag_storage"))
+    pipeline.add_documents(corpus.documents())
+    return sum(len(chunks) for chunks in pipeline.chunks.values())
+
+def probe_imports(workdir: Path, env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def probe_server(workdir: Path, env: dict, timeout: float) -> dict:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    first_response = None
+    ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                response = requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            except requests.RequestException:
+                time.sleep(0.01)
+                continue
+            if first_response is None:
+                first_response = time.perf_counter() - start
+            if response.status_code == 200:
+                ready = time.perf_counter() - start
+                break
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    if ready is None:
+        raise RuntimeError(f"Server was not ready within {timeout}s")
+    return {"first_response_seconds": first_response, "ready_seconds": ready}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend startup time")
+    parser.add_argument("--papers", type=int, default=100, help="synthetic papers in the index")
+    parser.add_argument("--pages", type=int, default=10, help="pages per synthetic paper")
+    parser.add_argument("--runs", type=int, default=3, help="measurements to take the median of")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for the server")
+    parser.add_argument("--max-import-seconds", type=float, help="fail if importing the app takes longer")
+    parser.add_argument("--max-ready-seconds", type=float, help="fail if the server takes longer to be ready")
+    parser.add_argument("--json", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("OPENROUTER_API_KEY", "startup-benchmark")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        print(f"📄 Building an index of {args.papers} papers...")
+        chunks = build_index(workdir, args.papers, args.pages)
+
+        samples = []
+        for run in range(args.runs):
+            sample = {**probe_imports(workdir, env), **probe_server(workdir, env, args.timeout)}
+            samples.append(sample)
+            print(f"  run {run + 1}: " + ", ".join(f"{key}={value:.3f}" for key, value in sample.items()))
+
+    results = {
+        "papers": args.papers,
+        "chunks": chunks,
+        **{key: round(statistics.median(s[key] for s in samples), 3) for key in samples[0]},
+    }
+    print(f"\n🚀 Median over {args.runs} runs ({chunks} chunks): import {results['import_seconds']}s, "
+          f"index load {results['load_seconds']}s, first response {results['first_response_seconds']}s, "
+          f"ready {results['ready_seconds']}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    if args.max_import_seconds is not None and results["import_seconds"] > args.max_import_seconds:
+        print(f"❌ Import took longer than {args.max_import_seconds}s")
+        failed = True
+    if args.max_ready_seconds is not None and results["ready_seconds"] > args.max_ready_seconds:
+        print(f"❌ Server took longer than {args.max_ready_seconds}s to be ready")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,38 @@
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
 from typing import Dict, List
 import json
 
+from telemetry import record_llm_call, span
+
 load_dotenv()
 
+# Parts of a paper's analysis, each generated by its own LLM call, and the paper data fields they fill
+SUMMARY_FACETS = {
+    "summary": ("summary",),
+    "pros_cons": ("pros", "cons"),
+    "future_work": ("future_work",),
+}
+
 class PaperSummarizer:
     def __init__(self):
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-        )
+        self._client = None
+        self.model = os.getenv("LLM_MODEL", "openai/gpt-oss-20b:free")
+    
+    @property
+    def client(self):
+        # The OpenAI SDK is slow to import, so the client is created on first use
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(
+                base_url=os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1"),
+                api_key=os.getenv("OPENROUTER_API_KEY"),
+            )
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
     
     def _truncate_text(self, text: str, max_tokens: int = 3000) -> str:
         """Truncate text to fit within token limits."""
@@ -30,33 +51,57 @@ class PaperSummarizer:
     
     def generate_summary(self, text: str) -> Dict:
         """Generate summary, pros/cons, and future work for a research paper."""
+        result = {}
+        for facet in SUMMARY_FACETS:
+            try:
+                result.update(self.generate_facet(text, facet))
+            except Exception as e:
+                result.update(self._facet_error(facet, e))
+        return result
+    
+    def generate_facet(self, text: str, facet: str) -> Dict:
+        """Generate the fields of one facet (see SUMMARY_FACETS); raises if the LLM call fails."""
         # Truncate text if too long
         truncated_text = self._truncate_text(text)
         
-        try:
-            # Generate summary
-            summary = self._generate_summary(truncated_text)
-            
-            # Generate pros and cons
+        if facet == "summary":
+            return {"summary": self._generate_summary(truncated_text)}
+        if facet == "pros_cons":
             pros_cons = self._generate_pros_cons(truncated_text)
-            
-            # Generate future work
-            future_work = self._generate_future_work(truncated_text)
-            
-            return {
-                "summary": summary,
-                "pros": pros_cons.get("pros", []),
-                "cons": pros_cons.get("cons", []),
-                "future_work": future_work
-            }
-            
-        except Exception as e:
-            return {
-                "summary": f"Error generating summary: {str(e)}",
-                "pros": [],
-                "cons": [],
-                "future_work": []
-            }
+            return {"pros": pros_cons.get("pros", []), "cons": pros_cons.get("cons", [])}
+        if facet == "future_work":
+            return {"future_work": self._generate_future_work(truncated_text)}
+        raise ValueError(f"Unknown summary facet: {facet}")
+    
+    def _facet_error(self, facet: str, error: Exception) -> Dict:
+        """Fields shown in place of a facet that could not be generated."""
+        if facet == "summary":
+            return {"summary": f"Error generating summary: {str(error)}"}
+        if facet == "pros_cons":
+            return {"pros": [f"Error generating pros/cons: {str(error)}"], "cons": []}
+        return {"future_work": [f"Error generating future work: {str(error)}"]}
+    
+    def _complete(self, prompt: str, operation: str) -> str:
+        """Send a prompt to the LLM and return its stripped reply; raises if the call fails.
+        
+        Only the call itself counts as an LLM error; parsing the reply is the caller's business.
+        """
+        try:
+            with span(f"llm.{operation}"):
+                completion = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    extra_headers={
+                        "HTTP-Referer": "http://localhost:3000",
+                        "X-Title": "ResearchRAG",
+                    }
+                )
+        except Exception:
+            record_llm_call(self.model, operation, error=True)
+            raise
+        record_llm_call(self.model, operation, completion)
+        
+        return (completion.choices[0].message.content or "").strip()
     
     def _generate_summary(self, text: str) -> str:
         """Generate a comprehensive summary of the paper."""
@@ -71,20 +116,7 @@ Paper content:
 
 Summary:"""
 
-        try:
-            completion = self.client.chat.completions.create(
-                model="openai/gpt-oss-20b:free",
-                messages=[{"role": "user", "content": prompt}],
-                extra_headers={
-                    "HTTP-Referer": "http://localhost:3000",
-                    "X-Title": "ResearchRAG",
-                }
-            )
-            
-            return completion.choices[0].message.content.strip()
-            
-        except Exception as e:
-            return f"Error generating summary: {str(e)}"
+        return self._complete(prompt, "summary")
     
     def _generate_pros_cons(self, text: str) -> Dict[str, List[str]]:
         """Generate pros and cons of the research paper."""
@@ -99,27 +131,17 @@ Paper content:
 
 Analysis:"""
 
+        response = self._complete(prompt, "pros_cons")
+        
+        # Try to parse as JSON
         try:
-            completion = self.client.chat.completions.create(
-                model="openai/gpt-oss-20b:free",
-                messages=[{"role": "user", "content": prompt}],
-                extra_headers={
-                    "HTTP-Referer": "http://localhost:3000",
-                    "X-Title": "ResearchRAG",
-                }
-            )
-            
-            response = completion.choices[0].message.content.strip()
-            
-            # Try to parse as JSON
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, extract manually
-                return self._extract_pros_cons_from_text(response)
-                
-        except Exception as e:
-            return {"pros": [f"Error generating pros/cons: {str(e)}"], "cons": []}
+            parsed = json.loads(response)
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, dict) and isinstance(parsed.get("pros"), list) and isinstance(parsed.get("cons"), list):
+            return {"pros": parsed["pros"], "cons": parsed["cons"]}
+        # If JSON parsing fails or has another shape, extract manually
+        return self._extract_pros_cons_from_text(response)
     
     def _extract_pros_cons_from_text(self, text: str) -> Dict[str, List[str]]:
         """Extract pros and cons from unstructured text."""
@@ -168,29 +190,16 @@ Paper content:
 
 Future work suggestions:"""
 
-        try:
-            completion = self.client.chat.completions.create(
-                model="openai/gpt-oss-20b:free",
-                messages=[{"role": "user", "content": prompt}],
-                extra_headers={
-                    "HTTP-Referer": "http://localhost:3000",
-                    "X-Title": "ResearchRAG",
-                }
-            )
-            
-            response = completion.choices[0].message.content.strip()
-            
-            # Extract list items
-            future_work = []
-            for line in response.split('\n'):
-                line = line.strip()
-                if line.startswith('-'):
-                    future_work.append(line[1:].strip())
-                elif line and not any(word in line.lower() for word in ['future', 'work', 'suggestions']):
-                    # If it's not a header, treat as a suggestion
-                    future_work.append(line)
-            
-            return future_work[:5]  # Limit to 5 suggestions
-            
-        except Exception as e:
-            return [f"Error generating future work: {str(e)}"]
+        response = self._complete(prompt, "future_work")
+        
+        # Extract list items
+        future_work = []
+        for line in response.split('\n'):
+            line = line.strip()
+            if line.startswith('-'):
+                future_work.append(line[1:].strip())
+            elif line and not any(word in line.lower() for word in ['future', 'work', 'suggestions']):
+                # If it's not a header, treat as a suggestion
+                future_work.append(line)
+        
+        return future_work[:5]  # Limit to 5 suggestions
@@ -0,0 +1,200 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from summarizer import SUMMARY_FACETS
+from telemetry import span
+
+def pending_facets() -> Dict[str, Dict]:
+    """Facet statuses for a newly uploaded paper, before anything is generated."""
+    return {facet: {"status": "pending"} for facet in SUMMARY_FACETS}
+
+def facet_statuses(paper_data: Dict) -> Dict[str, Dict]:
+    """Status of every facet of a paper: pending, running, ready or failed.
+
+    Papers stored before facets had statuses count as ready when their fields are present.
+    """
+    stored = paper_data.get("facets", {})
+    statuses = {}
+    for facet, fields in SUMMARY_FACETS.items():
+        if facet in stored:
+            statuses[facet] = stored[facet]
+        elif all(field in paper_data for field in fields):
+            statuses[facet] = {"status": "ready"}
+        else:
+            statuses[facet] = {"status": "pending"}
+    return statuses
+
+def parse_facets(value: Optional[str]) -> Tuple[str, ...]:
+    """Facet names from a comma-separated list; empty or ``all`` means every facet."""
+    if not value or value.strip().lower() == "all":
+        return tuple(SUMMARY_FACETS)
+    if value.strip().lower() == "none":
+        return ()
+    facets = tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [facet for facet in facets if facet not in SUMMARY_FACETS]
+    if unknown:
+        raise ValueError(f"Unknown summary facets: {', '.join(unknown)} (expected {', '.join(SUMMARY_FACETS)})")
+    return facets
+
+class SummaryFacets:
+    """Generates a paper's summary facets on demand and stores them in its data file.
+
+    Each facet is generated at most once at a time: concurrent requests in this
+    process wait for the same LLM call, and a facet another worker process has
+    marked ``running`` is waited for until it finishes, that process exits or
+    ``running_timeout`` seconds pass. A failed facet is retried once its
+    ``retry_at`` time has passed, ``retry_after`` seconds after the first
+    failure and twice as long after each further one (up to ``max_retry_after``),
+    or earlier when the caller asks for a retry explicitly.
+    """
+
+    def __init__(
+        self,
+        summarizer,
+        data_dir: Path = Path("data"),
+        running_timeout: float = 300.0,
+        poll_interval: float = 0.5,
+        retry_after: float = 60.0,
+        max_retry_after: float = 3600.0
+    ):
+        self.summarizer = summarizer
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+        self.running_timeout = running_timeout
+        self.poll_interval = poll_interval
+        self.retry_after = retry_after
+        self.max_retry_after = max_retry_after
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Tuple[str, str], threading.Event] = {}
+
+    def load(self, paper_id: str) -> Optional[Dict]:
+        data_file = self.data_dir / f"{paper_id}.json"
+        if not data_file.exists():
+            return None
+        with open(data_file, "r") as f:
+            return json.load(f)
+
+    def missing(self, paper_data: Dict, facets: Iterable[str], retry: bool = False) -> Tuple[str, ...]:
+        """The facets among ``facets`` that still need generating: not ready, and not failed recently unless ``retry``."""
+        statuses = facet_statuses(paper_data)
+        return tuple(
+            facet for facet in facets
+            if statuses[facet]["status"] != "ready" and (retry or not self._cooling_down(statuses[facet]))
+        )
+
+    def _cooling_down(self, status: Dict) -> bool:
+        return status["status"] == "failed" and time.time() < status.get("retry_at", 0)
+
+    def generate(self, paper_id: str, facet: str, retry: bool = False) -> Dict:
+        """Make sure a facet is generated and return its status; blocks until it is ready or failed.
+
+        A facet that failed recently is only generated again with ``retry``.
+        """
+        key = (paper_id, facet)
+        with self._lock:
+            event = self._in_flight.get(key)
+            owner = event is None
+            if owner:
+                event = self._in_flight[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            return self._status(paper_id, facet)
+
+        try:
+            return self._generate(paper_id, facet, retry)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            event.set()
+
+    def _generate(self, paper_id: str, facet: str, retry: bool) -> Dict:
+        while True:
+            paper_data, status = self._claim(paper_id, facet, retry)
+            if paper_data is not None:
+                break
+            if status["status"] != "running":
+                return status
+            # Another worker is generating this facet
+            time.sleep(self.poll_interval)
+
+        try:
+            with span(f"summary.{facet}"):
+                fields = self.summarizer.generate_facet(paper_data["content"], facet)
+        except Exception as e:
+            print(f"Error generating {facet} for {paper_id}: {e}")
+            # Back off further after each consecutive failure, so an LLM outage isn't hammered by polling clients
+            attempts = status.get("attempts", 0) + 1
+            delay = min(self.retry_after * 2 ** (attempts - 1), self.max_retry_after)
+            failed = {"status": "failed", "error": str(e), "attempts": attempts, "retry_at": time.time() + delay}
+            return self._update(paper_id, facet, failed)
+        return self._update(paper_id, facet, {"status": "ready"}, fields)
+
+    def _claim(self, paper_id: str, facet: str, retry: bool = False) -> Tuple[Optional[Dict], Dict]:
+        """Mark a facet running if nobody is generating it and it may be tried now; returns (paper data if claimed, status)."""
+        with self._file_lock():
+            paper_data = self.load(paper_id)
+            if paper_data is None:
+                raise FileNotFoundError(f"Paper not found: {paper_id}")
+
+            status = facet_statuses(paper_data)[facet]
+            if status["status"] == "ready" or (status["status"] == "running" and not self._abandoned(status)):
+                return None, status
+            if not retry and self._cooling_down(status):
+                return None, status
+
+            status = {"status": "running", "started_at": time.time(), "pid": os.getpid(), "attempts": status.get("attempts", 0)}
+            paper_data.setdefault("facets", facet_statuses(paper_data))[facet] = status
+            self._write(paper_data)
+            return paper_data, status
+
+    def _abandoned(self, status: Dict) -> bool:
+        """Whether a running facet's worker has exited or taken too long."""
+        if time.time() - status.get("started_at", 0) >= self.running_timeout:
+            return True
+        try:
+            os.kill(status.get("pid", 0), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass
+        return False
+
+    def _update(self, paper_id: str, facet: str, status: Dict, fields: Optional[Dict] = None) -> Dict:
+        # Re-read under the lock so facets finished meanwhile by other threads are kept
+        with self._file_lock():
+            paper_data = self.load(paper_id)
+            if paper_data is None:
+                return status
+            paper_data.update(fields or {})
+            paper_data.setdefault("facets", facet_statuses(paper_data))[facet] = status
+            self._write(paper_data)
+        return status
+
+    def _status(self, paper_id: str, facet: str) -> Dict:
+        paper_data = self.load(paper_id)
+        return facet_statuses(paper_data)[facet] if paper_data else {"status": "pending"}
+
+    def _write(self, paper_data: Dict):
+        # Replace the file atomically so readers never see half-written JSON
+        data_file = self.data_dir / f"{paper_data['paper_id']}.json"
+        temp_file = data_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_file, "w") as f:
+            json.dump(paper_data, f, indent=2)
+        os.replace(temp_file, data_file)
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize data file updates across threads and worker processes."""
+        with open(self.data_dir / ".summaries.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
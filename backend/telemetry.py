@@ -0,0 +1,256 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds, from fast index lookups up to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# USD per million (prompt, completion) tokens
+LLM_PRICES = {
+    "openai/gpt-oss-20b:free": (0.0, 0.0),
+}
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class Counter:
+    """Monotonic counter with labels, rendered in Prometheus text format."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, rendered in Prometheus text format."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0.0
+                for i, bound in enumerate(self.buckets):
+                    cumulative += state[i]
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+        return lines
+
+class Gauge:
+    """Gauge whose samples are read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str], collect: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for key, value in self.collect():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "researchrag_stage_duration_seconds", "Time spent in each processing stage.", ["stage"]
+))
+HTTP_SECONDS = REGISTRY.register(Histogram(
+    "researchrag_http_request_duration_seconds", "HTTP request latency by route.", ["method", "route", "status"]
+))
+LLM_REQUESTS = REGISTRY.register(Counter(
+    "researchrag_llm_requests_total", "LLM API calls by outcome.", ["model", "operation", "status"]
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "researchrag_llm_tokens_total", "LLM tokens used, by prompt or completion.", ["model", "operation", "kind"]
+))
+LLM_COST = REGISTRY.register(Counter(
+    "researchrag_llm_cost_usd_total", "Estimated LLM spend in USD.", ["model", "operation"]
+))
+
+class Trace:
+    """Stage timings and LLM usage recorded while handling one request.
+
+    Plain lists so a trace can be pickled back from a worker process.
+    """
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+        self.llm_calls: List[Dict] = []
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(call["prompt_tokens"] for call in self.llm_calls)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(call["completion_tokens"] for call in self.llm_calls)
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(call["cost_usd"] for call in self.llm_calls)
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Total seconds per stage, in first-seen order."""
+        totals: Dict[str, float] = {}
+        for stage, seconds in self.stages:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def server_timing(self) -> str:
+        """The stages as a Server-Timing header value (durations in ms)."""
+        return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stage_totals().items())
+
+    def llm_usage(self) -> str:
+        return (
+            f"calls={len(self.llm_calls)}; prompt_tokens={self.prompt_tokens}; "
+            f"completion_tokens={self.completion_tokens}; cost_usd={self.cost_usd:.6f}"
+        )
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("researchrag_trace", default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def start_trace():
+    """Collect spans for the enclosed work (and threads it hands its context to)."""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+def record_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    trace = current_trace()
+    if trace is not None:
+        trace.stages.append((stage, seconds))
+
+@contextmanager
+def span(stage: str):
+    """Time a stage into the stage histogram and the current request's trace."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+def llm_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of one call; LLM_PRICE_* env vars override the table."""
+    prompt_price, completion_price = LLM_PRICES.get(model, (0.0, 0.0))
+    prompt_price = float(os.getenv("LLM_PRICE_PROMPT_PER_MTOK", prompt_price))
+    completion_price = float(os.getenv("LLM_PRICE_COMPLETION_PER_MTOK", completion_price))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+def record_llm_call(model: str, operation: str, completion=None, error: bool = False):
+    """Count an LLM call and, when the response reports usage, its tokens and cost."""
+    usage = getattr(completion, "usage", None)
+    prompt_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
+    completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
+    _record_llm(model, operation, "error" if error else "ok", prompt_tokens, completion_tokens)
+
+def _record_llm(model: str, operation: str, status: str, prompt_tokens: int, completion_tokens: int):
+    cost = llm_cost(model, prompt_tokens, completion_tokens)
+
+    LLM_REQUESTS.inc(model=model, operation=operation, status=status)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, operation=operation, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, operation=operation, kind="completion")
+    if cost:
+        LLM_COST.inc(cost, model=model, operation=operation)
+
+    trace = current_trace()
+    if trace is not None:
+        trace.llm_calls.append({
+            "model": model,
+            "operation": operation,
+            "status": status,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost_usd": cost,
+        })
+
+def call_with_trace(fn: Callable, *args, **kwargs):
+    """Run ``fn`` under a fresh trace and return (result, trace).
+
+    Used for work sent to another process, whose metrics would otherwise be lost.
+    """
+    with start_trace() as trace:
+        result = fn(*args, **kwargs)
+    return result, trace
+
+def merge_trace(trace: Trace):
+    """Replay a worker process's trace into this process's metrics and current trace."""
+    for stage, seconds in trace.stages:
+        record_stage(stage, seconds)
+    for call in trace.llm_calls:
+        _record_llm(call["model"], call["operation"], call["status"], call["prompt_tokens"], call["completion_tokens"])
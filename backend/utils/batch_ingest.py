@@ -0,0 +1,109 @@
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+from summarizer import SUMMARY_FACETS
+from summary_facets import pending_facets
+from .url_processor import HostThrottle, URLProcessor
+
+class BatchIngester:
+    """Ingest many URLs / arXiv IDs with bounded concurrency and a single index commit."""
+
+    def __init__(
+        self,
+        rag_pipeline,
+        summaries=None,
+        data_dir: Path = Path("data"),
+        max_workers: int = 8,
+        max_per_host: int = 2,
+        host_interval: float = 1.0,
+        summary_workers: int = 4
+    ):
+        self.rag_pipeline = rag_pipeline
+        self.summaries = summaries
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+        self.max_workers = max_workers
+        self.summary_workers = summary_workers
+        self.url_processor = URLProcessor(
+            throttle=HostThrottle(max_per_host=max_per_host, min_interval=host_interval)
+        )
+
+    def ingest(self, sources: List[str], summarize: bool = True) -> List[Dict]:
+        """Fetch, index and optionally summarize a list of sources.
+
+        Without ``summarize``, summary facets are left pending and generated
+        when first requested. Returns one result per unique source, in input order.
+        """
+        # Normalize and de-duplicate while keeping the caller's order
+        urls = []
+        seen = set()
+        for source in sources:
+            if not source or not source.strip():
+                continue
+            url = self.url_processor.normalize_source(source)
+            if url not in seen:
+                seen.add(url)
+                urls.append(url)
+
+        if not urls:
+            return []
+
+        # Fetch and extract concurrently; the host throttle keeps each site polite
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(self._fetch, urls))
+
+        fetched = [r for r in results if r["status"] == "ok"]
+
+        # Embed every fetched paper together and commit the index once
+        if fetched:
+            try:
+                self.rag_pipeline.add_documents({r["paper_id"]: r.pop("_content") for r in fetched})
+            except Exception as e:
+                for r in fetched:
+                    # Don't leave paper data behind for papers that are not in the index
+                    (self.data_dir / f"{r['paper_id']}.json").unlink(missing_ok=True)
+                    r.update({"status": "error", "paper_id": None, "error": f"Error indexing paper: {str(e)}"})
+                fetched = []
+
+        if summarize and self.summaries and fetched:
+            facets = [(r["paper_id"], facet) for r in fetched for facet in SUMMARY_FACETS]
+            with ThreadPoolExecutor(max_workers=self.summary_workers) as pool:
+                list(pool.map(lambda item: self.summaries.generate(*item), facets))
+
+        for r in results:
+            r.pop("_content", None)
+
+        return results
+
+    def _fetch(self, url: str) -> Dict:
+        """Download and extract one source, saving its paper data."""
+        paper_id = str(uuid.uuid4())
+        try:
+            text_content, title = self.url_processor.process_url(url)
+
+            paper_data = {
+                "paper_id": paper_id,
+                "title": title,
+                "content": text_content,
+                "source": url,
+                "facets": pending_facets()
+            }
+            self._write_paper(paper_data)
+
+            return {
+                "source": url,
+                "paper_id": paper_id,
+                "title": title,
+                "status": "ok",
+                "_content": text_content
+            }
+        except Exception as e:
+            return {"source": url, "paper_id": None, "status": "error", "error": str(e)}
+
+    def _write_paper(self, paper_data: Dict):
+        data_file = self.data_dir / f"{paper_data['paper_id']}.json"
+        with open(data_file, "w") as f:
+            json.dump(paper_data, f, indent=2)
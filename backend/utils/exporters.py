@@ -2,162 +2,230 @@ from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-import tempfile
+from abc import ABC, abstractmethod
+from functools import lru_cache
+import hashlib
+import json
 import os
+import time
+import uuid
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
-class MarkdownExporter:
-    def __init__(self):
-        self.export_dir = Path("exports")
-        self.export_dir.mkdir(exist_ok=True)
-    
-    def export(self, paper_data: Dict) -> str:
-        """Export paper summary to Markdown format."""
-        title = paper_data.get("title", "Untitled Paper")
-        summary = paper_data.get("summary", "")
-        pros = paper_data.get("pros", [])
-        cons = paper_data.get("cons", [])
-        future_work = paper_data.get("future_work", [])
-        
-        # Create markdown content
-        markdown_content = f"""# {title}
+# Bump when the rendered layout changes so cached exports are regenerated
+EXPORT_FORMAT_VERSION = 1
 
-## Summary
+# Seconds an older export is kept after it was last handed out, since it may still be downloading
+STALE_EXPORT_GRACE = 300
 
-{summary}
+# Fields that determine the exported content
+EXPORT_FIELDS = ("title", "summary", "pros", "cons", "future_work")
 
-## Strengths
+def summary_version(paper_data: Dict) -> str:
+    """Content hash of everything that ends up in an export."""
+    payload = json.dumps(
+        {
+            "format_version": EXPORT_FORMAT_VERSION,
+            **{field: paper_data.get(field) for field in EXPORT_FIELDS}
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
 
-"""
-        
-        for pro in pros:
-            markdown_content += f"- {pro}\n"
-        
-        markdown_content += "\n## Weaknesses\n\n"
-        
-        for con in cons:
-            markdown_content += f"- {con}\n"
-        
-        markdown_content += "\n## Future Work\n\n"
-        
-        for work in future_work:
-            markdown_content += f"- {work}\n"
-        
-        markdown_content += f"""
-
----
-
-*Generated by ResearchRAG*
-"""
-        
-        # Save to file
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        filename = f"{safe_title[:50]}.md"
-        file_path = self.export_dir / filename
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
-        
-        return str(file_path)
+@lru_cache(maxsize=1)
+def _get_pdf_styles() -> Dict[str, ParagraphStyle]:
+    """Build the ReportLab styles once per process."""
+    styles = getSampleStyleSheet()
 
-class PDFExporter:
-    def __init__(self):
-        self.export_dir = Path("exports")
-        self.export_dir.mkdir(exist_ok=True)
-    
-    def export(self, paper_data: Dict) -> str:
-        """Export paper summary to PDF format."""
-        title = paper_data.get("title", "Untitled Paper")
-        summary = paper_data.get("summary", "")
-        pros = paper_data.get("pros", [])
-        cons = paper_data.get("cons", [])
-        future_work = paper_data.get("future_work", [])
-        
-        # Create safe filename
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        filename = f"{safe_title[:50]}.pdf"
-        file_path = self.export_dir / filename
-        
-        # Create PDF
-        doc = SimpleDocTemplate(str(file_path), pagesize=letter)
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
+    return {
+        "title": ParagraphStyle(
             'CustomTitle',
             parent=styles['Heading1'],
             fontSize=18,
             spaceAfter=30,
             alignment=1  # Center alignment
-        )
-        
-        heading_style = ParagraphStyle(
+        ),
+        "heading": ParagraphStyle(
             'CustomHeading',
             parent=styles['Heading2'],
             fontSize=14,
             spaceAfter=12,
             spaceBefore=20
-        )
-        
-        body_style = ParagraphStyle(
+        ),
+        "body": ParagraphStyle(
             'CustomBody',
             parent=styles['Normal'],
             fontSize=11,
             spaceAfter=12,
             alignment=0  # Left alignment
-        )
-        
-        bullet_style = ParagraphStyle(
+        ),
+        "bullet": ParagraphStyle(
             'CustomBullet',
             parent=styles['Normal'],
             fontSize=11,
             spaceAfter=6,
             leftIndent=20,
             bulletIndent=10
-        )
-        
+        ),
+        "footer": ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=9,
+            alignment=1,  # Center alignment
+            textColor='gray'
+        ),
+    }
+
+class CachedExporter(ABC):
+    """Base class for exporters whose output is cached on disk.
+
+    Files are named by paper ID and a hash of the exported content, so a
+    repeat download is served from disk and a changed summary gets a new file.
+    """
+    extension = ""
+
+    def __init__(self):
+        self.export_dir = Path("exports")
+        self.export_dir.mkdir(exist_ok=True)
+
+    def cache_path(self, paper_data: Dict) -> Path:
+        paper_id = paper_data.get("paper_id") or "paper"
+        return self.export_dir / f"{paper_id}-{summary_version(paper_data)}.{self.extension}"
+
+    def export(self, paper_data: Dict) -> str:
+        """Return the export file for this paper, rendering it only if it is stale."""
+        file_path = self.cache_path(paper_data)
+        if file_path.exists():
+            try:
+                # Mark it as in use, so _remove_stale leaves it alone while it is served
+                os.utime(file_path)
+            except FileNotFoundError:
+                pass
+            else:
+                return str(file_path)
+
+        # Render to a temporary name and rename, so readers never see a partial file
+        temp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            self._render(paper_data, temp_path)
+            os.replace(temp_path, file_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+        self._remove_stale(paper_data, file_path)
+        return str(file_path)
+
+    def _remove_stale(self, paper_data: Dict, current: Path):
+        """Delete older versions of this paper's export not handed out within STALE_EXPORT_GRACE seconds."""
+        paper_id = paper_data.get("paper_id")
+        if not paper_id:
+            return
+        cutoff = time.time() - STALE_EXPORT_GRACE
+        for old_path in self.export_dir.glob(f"{paper_id}-*.{self.extension}"):
+            if old_path != current:
+                try:
+                    if old_path.stat().st_mtime < cutoff:
+                        old_path.unlink()
+                except OSError:
+                    pass
+
+    @abstractmethod
+    def _render(self, paper_data: Dict, file_path: Path):
+        """Write the export for ``paper_data`` to ``file_path``."""
+
+class MarkdownExporter(CachedExporter):
+    extension = "md"
+
+    def _render(self, paper_data: Dict, file_path: Path):
+        """Export paper summary to Markdown format."""
+        title = paper_data.get("title", "Untitled Paper")
+        summary = paper_data.get("summary", "")
+        pros = paper_data.get("pros", [])
+        cons = paper_data.get("cons", [])
+        future_work = paper_data.get("future_work", [])
+
+        # Create markdown content
+        lines = [f"# {title}", "", "## Summary", "", summary, "", "## Strengths", ""]
+        lines.extend(f"- {pro}" for pro in pros)
+        lines.extend(["", "## Weaknesses", ""])
+        lines.extend(f"- {con}" for con in cons)
+        lines.extend(["", "## Future Work", ""])
+        lines.extend(f"- {work}" for work in future_work)
+        lines.extend(["", "", "---", "", "*Generated by ResearchRAG*", ""])
+
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+
+class PDFExporter(CachedExporter):
+    extension = "pdf"
+
+    def _render(self, paper_data: Dict, file_path: Path):
+        """Export paper summary to PDF format."""
+        title = paper_data.get("title", "Untitled Paper")
+        summary = paper_data.get("summary", "")
+        pros = paper_data.get("pros", [])
+        cons = paper_data.get("cons", [])
+        future_work = paper_data.get("future_work", [])
+
+        # Create PDF
+        doc = SimpleDocTemplate(str(file_path), pagesize=letter)
+        styles = _get_pdf_styles()
+        heading_style = styles["heading"]
+        bullet_style = styles["bullet"]
+
         # Build content
         story = []
-        
+
         # Title
-        story.append(Paragraph(title, title_style))
+        story.append(Paragraph(title, styles["title"]))
         story.append(Spacer(1, 20))
-        
+
         # Summary
         story.append(Paragraph("Summary", heading_style))
-        story.append(Paragraph(summary, body_style))
+        story.append(Paragraph(summary, styles["body"]))
         story.append(Spacer(1, 15))
-        
+
         # Strengths
         story.append(Paragraph("Strengths", heading_style))
         for pro in pros:
             story.append(Paragraph(f"• {pro}", bullet_style))
         story.append(Spacer(1, 15))
-        
+
         # Weaknesses
         story.append(Paragraph("Weaknesses", heading_style))
         for con in cons:
             story.append(Paragraph(f"• {con}", bullet_style))
         story.append(Spacer(1, 15))
-        
+
         # Future Work
         story.append(Paragraph("Future Work", heading_style))
         for work in future_work:
             story.append(Paragraph(f"• {work}", bullet_style))
         story.append(Spacer(1, 30))
-        
+
         # Footer
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=9,
-            alignment=1,  # Center alignment
-            textColor='gray'
-        )
-        story.append(Paragraph("Generated by ResearchRAG", footer_style))
-        
+        story.append(Paragraph("Generated by ResearchRAG", styles["footer"]))
+
         # Build PDF
         doc.build(story)
-        
-        return str(file_path)
+
+EXPORTERS = {
+    "markdown": MarkdownExporter,
+    "pdf": PDFExporter,
+}
+
+def export_paper_file(data_file: str, format: str, title_filter: Optional[str] = None) -> Optional[Tuple[str, str, str]]:
+    """Load a stored paper and export it; safe to run in a worker process.
+
+    Returns (paper_id, title, export path), or None when the paper's title
+    does not contain ``title_filter``.
+    """
+    with open(data_file, "r") as f:
+        paper_data = json.load(f)
+
+    title = paper_data.get("title", "Untitled Paper")
+    if title_filter and title_filter.lower() not in title.lower():
+        return None
+
+    return paper_data.get("paper_id", Path(data_file).stem), title, EXPORTERS[format]().export(paper_data)
@@ -0,0 +1,288 @@
+import re
+from html import unescape
+from typing import Iterable, Tuple
+
+# Elements whose content is never useful paper text
+SKIP_TAGS = {
+    'script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe',
+    'nav', 'footer', 'header', 'aside', 'form', 'button', 'select', 'menu'
+}
+
+# Elements whose content is raw text and must be skipped without tokenizing
+RAW_TEXT_TAGS = {'script', 'style', 'textarea', 'xmp'}
+
+# Elements that start a new line of text
+BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'main', 'br', 'li', 'ul', 'ol', 'dl', 'dt', 'dd',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table', 'tr', 'td', 'th', 'blockquote',
+    'pre', 'figure', 'figcaption', 'hr', 'caption'
+}
+
+# Elements that never have a closing tag
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr'
+}
+
+# Containers that are never dropped by class/id heuristics
+PROTECTED_TAGS = {'html', 'body', 'main', 'article'}
+
+# class/id fragments that mark boilerplate containers
+BOILERPLATE_PATTERN = re.compile(
+    r'(^|[\s_-])(nav|navbar|menu|footer|header|sidebar|breadcrumb|cookie|banner|share|social|comment|advert|ads?)($|[\s_-])',
+    re.IGNORECASE
+)
+
+BOILERPLATE_ROLES = {'navigation', 'banner', 'contentinfo', 'complementary'}
+
+# One token per match: comments, doctypes/processing instructions, or a start/end tag.
+# Every alternative is anchored on a literal terminator, so matching stays linear.
+TOKEN_PATTERN = re.compile(
+    r'<(?:!--.*?-->|[!?][^>]*>|(/?)([a-zA-Z][a-zA-Z0-9:-]*)([^>]*?)\s*>)',
+    re.DOTALL
+)
+
+RAW_TEXT_END_PATTERNS = {
+    tag: re.compile(r'</(%s)\s*>' % tag, re.IGNORECASE) for tag in RAW_TEXT_TAGS
+}
+
+ATTR_PATTERN = re.compile(r'''\b(class|id|role)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+
+# Minimum characters for <article>/<main> text to be preferred over the whole body
+MIN_PREFERRED_CHARS = 500
+
+# Below this fraction of the unfiltered text, the class/id heuristics are assumed
+# to have dropped real content and the unfiltered text is used instead
+MIN_FILTERED_RATIO = 0.1
+
+class HTMLTextExtractor:
+    """Incremental HTML-to-text extractor with boilerplate removal.
+
+    Feed the document in pieces with ``feed`` and call ``close`` at the end.
+    Text inside <article> and <main> is collected separately so the main
+    content can be preferred over navigation-heavy page text. Containers that
+    only look like boilerplate by class/id never hide an <article> or <main>
+    inside them, and text is also kept without those heuristics as a fallback.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._raw_end = None
+        self._stack = []
+        self._open_counts = {}
+        self._skip_depth = 0
+        self._hard_skip_depth = 0
+        self._article_depth = 0
+        self._main_depth = 0
+        self._in_title = False
+        self._title_parts = []
+        self._body_parts = []
+        self._article_parts = []
+        self._main_parts = []
+        self._unfiltered_parts = []
+
+    def feed(self, chunk: str):
+        self._buffer += chunk
+        self._process(final=False)
+
+    def close(self):
+        self._process(final=True)
+        self._buffer = ''
+
+    def _process(self, final: bool):
+        buffer = self._buffer
+        pos = 0
+        length = len(buffer)
+        search = TOKEN_PATTERN.search
+
+        while pos < length:
+            if self._raw_end is not None:
+                # Inside <script>/<style>: jump straight to the closing tag
+                match = self._raw_end.search(buffer, pos)
+                if match is None:
+                    # Keep a short tail in case the closing tag straddles chunks
+                    pos = max(pos, length - 16)
+                    break
+                self._raw_end = None
+                self._end_tag(match.group(1).lower())
+                pos = match.end()
+                continue
+
+            match = search(buffer, pos)
+            if match is None:
+                tail = length
+                if not final:
+                    # Hold back a partial tag or entity that may finish in the next chunk
+                    lt = buffer.rfind('<', pos)
+                    amp = buffer.rfind('&', pos)
+                    if lt != -1:
+                        tail = lt
+                    if amp != -1 and amp < tail and ';' not in buffer[amp:tail] and tail - amp < 32:
+                        tail = amp
+                self._text(buffer[pos:tail])
+                pos = tail
+                break
+
+            start = match.start()
+            if not final and buffer.startswith('<!--', start) and not match.group().endswith('-->'):
+                # Comment continues in the next chunk
+                self._text(buffer[pos:start])
+                pos = start
+                break
+
+            if start > pos:
+                # Anything before the tag, including stray '<' characters, is text
+                self._text(buffer[pos:start])
+            pos = match.end()
+
+            name = match.group(2)
+            if name is None:
+                continue
+
+            name = name.lower()
+            if match.group(1):
+                self._end_tag(name)
+            else:
+                attrs = match.group(3)
+                self._start_tag(name, attrs)
+                if name in RAW_TEXT_END_PATTERNS and not attrs.endswith('/'):
+                    self._raw_end = RAW_TEXT_END_PATTERNS[name]
+
+        self._buffer = buffer[pos:]
+
+    def _start_tag(self, tag: str, attrs: str):
+        if tag in BLOCK_TAGS:
+            self._newline()
+
+        if tag in VOID_TAGS or attrs.endswith('/'):
+            return
+
+        hard = tag in SKIP_TAGS
+        skip = hard or bool(attrs and tag not in PROTECTED_TAGS and self._is_boilerplate(attrs))
+        saved_skip = None
+        if tag in PROTECTED_TAGS and self._skip_depth and not self._hard_skip_depth:
+            # Main content inside a wrapper whose class/id merely looks like boilerplate
+            saved_skip = self._skip_depth
+            self._skip_depth = 0
+        self._stack.append((tag, skip, hard, saved_skip))
+        self._open_counts[tag] = self._open_counts.get(tag, 0) + 1
+        if hard:
+            self._hard_skip_depth += 1
+        if skip:
+            self._skip_depth += 1
+        elif tag == 'article':
+            self._article_depth += 1
+        elif tag == 'main':
+            self._main_depth += 1
+        elif tag == 'title':
+            self._in_title = True
+
+    def _end_tag(self, tag: str):
+        # Tolerate unclosed children by popping up to the matching open tag
+        if not self._open_counts.get(tag):
+            return
+
+        while self._stack:
+            open_tag, skip, hard, saved_skip = self._stack.pop()
+            self._open_counts[open_tag] -= 1
+            if hard:
+                self._hard_skip_depth -= 1
+            if saved_skip is not None:
+                self._skip_depth = saved_skip
+            if skip:
+                self._skip_depth -= 1
+            elif open_tag == 'article':
+                self._article_depth -= 1
+            elif open_tag == 'main':
+                self._main_depth -= 1
+            elif open_tag == 'title':
+                self._in_title = False
+            if open_tag == tag:
+                break
+
+        if tag in BLOCK_TAGS:
+            self._newline()
+
+    def _text(self, data: str):
+        if not data:
+            return
+        if '&' in data:
+            data = unescape(data)
+
+        if self._in_title:
+            self._title_parts.append(data)
+            return
+        if not self._hard_skip_depth:
+            self._unfiltered_parts.append(data)
+        if self._skip_depth:
+            return
+
+        self._body_parts.append(data)
+        if self._article_depth:
+            self._article_parts.append(data)
+        if self._main_depth:
+            self._main_parts.append(data)
+
+    def _newline(self):
+        if not self._hard_skip_depth:
+            self._unfiltered_parts.append('\n')
+        if self._skip_depth:
+            return
+        self._body_parts.append('\n')
+        if self._article_depth:
+            self._article_parts.append('\n')
+        if self._main_depth:
+            self._main_parts.append('\n')
+
+    def _is_boilerplate(self, attrs: str) -> bool:
+        for match in ATTR_PATTERN.finditer(attrs):
+            name = match.group(1).lower()
+            value = match.group(2) or match.group(3) or match.group(4) or ''
+            if name == 'role':
+                if value.lower() in BOILERPLATE_ROLES:
+                    return True
+            elif BOILERPLATE_PATTERN.search(value):
+                return True
+        return False
+
+    @property
+    def title(self) -> str:
+        return _normalize_whitespace(''.join(self._title_parts)).replace('\n', ' ')
+
+    @property
+    def text(self) -> str:
+        """Best content text: <article>, then <main>, then the whole page."""
+        body = _normalize_whitespace(''.join(self._body_parts))
+        unfiltered = _normalize_whitespace(''.join(self._unfiltered_parts))
+        if len(body) < len(unfiltered) * MIN_FILTERED_RATIO:
+            return unfiltered
+
+        for parts in (self._article_parts, self._main_parts):
+            text = _normalize_whitespace(''.join(parts))
+            if len(text) >= MIN_PREFERRED_CHARS:
+                return text
+        return body
+
+def _normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces and blank lines without regex backtracking."""
+    lines = []
+    blank = False
+    for line in text.split('\n'):
+        line = ' '.join(line.split())
+        if line:
+            lines.append(line)
+            blank = False
+        elif not blank and lines:
+            lines.append('')
+            blank = True
+    return '\n'.join(lines).strip()
+
+def extract_text_from_html(chunks: Iterable[str]) -> Tuple[str, str]:
+    """Extract (text, title) from an HTML document given as a stream of string chunks."""
+    parser = HTMLTextExtractor()
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode('utf-8', errors='replace')
+        parser.feed(chunk)
+    parser.close()
+    return parser.text, parser.title
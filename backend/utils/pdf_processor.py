@@ -1,9 +1,9 @@
-import fitz  # PyMuPDF
-import PyPDF2
 import re
-from typing import Optional
+from typing import Optional, Tuple
 from pathlib import Path
 
+from telemetry import span
+
 class PDFProcessor:
     def __init__(self):
         pass
@@ -22,22 +22,28 @@ class PDFProcessor:
     
     def _extract_with_pymupdf(self, pdf_path: str) -> str:
         """Extract text using PyMuPDF."""
-        doc = fitz.open(pdf_path)
-        text = ""
-        
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            text += page.get_text()
-            text += "\n\n"  # Add page separator
+        import fitz  # PyMuPDF
         
-        doc.close()
-        return self._clean_text(text)
+        with span("pdf.pymupdf"):
+            doc = fitz.open(pdf_path)
+            text = ""
+            
+            for page_num in range(len(doc)):
+                page = doc.load_page(page_num)
+                text += page.get_text()
+                text += "\n\n"  # Add page separator
+            
+            doc.close()
+        with span("pdf.clean_text"):
+            return self._clean_text(text)
     
     def _extract_with_pypdf2(self, pdf_path: str) -> str:
         """Extract text using PyPDF2 as fallback."""
+        import PyPDF2
+        
         text = ""
         
-        with open(pdf_path, 'rb') as file:
+        with span("pdf.pypdf2"), open(pdf_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
             
             for page_num in range(len(pdf_reader.pages)):
@@ -45,7 +51,8 @@ class PDFProcessor:
                 text += page.extract_text()
                 text += "\n\n"  # Add page separator
         
-        return self._clean_text(text)
+        with span("pdf.clean_text"):
+            return self._clean_text(text)
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize extracted text."""
@@ -105,6 +112,8 @@ class PDFProcessor:
     
     def extract_metadata(self, pdf_path: str) -> dict:
         """Extract metadata from PDF."""
+        import fitz  # PyMuPDF
+        
         try:
             doc = fitz.open(pdf_path)
             metadata = doc.metadata
@@ -125,6 +134,9 @@ class PDFProcessor:
     
     def get_page_count(self, pdf_path: str) -> int:
         """Get the number of pages in the PDF."""
+        import fitz  # PyMuPDF
+        import PyPDF2
+        
         try:
             doc = fitz.open(pdf_path)
             page_count = len(doc)
@@ -137,3 +149,9 @@ class PDFProcessor:
                     return len(pdf_reader.pages)
             except Exception:
                 return 0
+
+def extract_pdf(pdf_path: str) -> Tuple[str, str]:
+    """Extract (text, title) from a PDF; safe to run in a worker process."""
+    processor = PDFProcessor()
+    text_content = processor.extract_text(pdf_path)
+    return text_content, processor.extract_title(text_content)
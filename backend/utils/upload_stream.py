@@ -0,0 +1,143 @@
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+from multipart.multipart import MultipartParser, parse_options_header
+
+# Plain form fields (e.g. "url") never need to be large
+MAX_FIELD_BYTES = 64 * 1024
+
+class UploadTooLarge(Exception):
+    """Raised when a streamed upload exceeds the configured maximum size."""
+
+class StreamedUpload:
+    """A file part that was written straight to disk while it was received."""
+
+    def __init__(self, filename: str, path: Path, sha256: str, size: int):
+        self.filename = filename
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+
+async def receive_multipart_upload(
+    request,
+    destination: Path,
+    max_bytes: int,
+    file_field: str = "file"
+) -> Tuple[Dict[str, str], Optional[StreamedUpload]]:
+    """Stream a multipart/form-data request body.
+
+    The ``file_field`` part is written to ``destination`` chunk by chunk as the
+    body arrives, hashing it on the way, so the upload is never held in memory
+    or copied through a temporary file. Other parts are returned as text fields.
+    Raises UploadTooLarge as soon as the file part passes ``max_bytes``.
+    """
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise ValueError("Missing multipart boundary")
+
+    events: List[Tuple[str, bytes]] = []
+    header_field = b""
+    header_value = b""
+    part_headers: Dict[bytes, bytes] = {}
+
+    def on_part_begin():
+        part_headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int):
+        nonlocal header_field
+        header_field += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        nonlocal header_value
+        header_value += data[start:end]
+
+    def on_header_end():
+        nonlocal header_field, header_value
+        part_headers[header_field.lower()] = header_value
+        header_field = b""
+        header_value = b""
+
+    def on_headers_finished():
+        events.append(("start", part_headers.get(b"content-disposition", b"")))
+
+    def on_part_data(data: bytes, start: int, end: int):
+        events.append(("data", data[start:end]))
+
+    def on_part_end():
+        events.append(("end", b""))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    fields: Dict[str, str] = {}
+    upload = None
+    out = None
+    digest = None
+    size = 0
+    field_name = None
+    field_value = b""
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+
+            for kind, payload in events:
+                if kind == "start":
+                    _, disposition = parse_options_header(payload)
+                    field_name = disposition.get(b"name", b"").decode("latin-1")
+                    filename = disposition.get(b"filename")
+                    field_value = b""
+                    if field_name == file_field and filename:
+                        out = await aiofiles.open(destination, "wb")
+                        digest = hashlib.sha256()
+                        size = 0
+                        upload = StreamedUpload(filename.decode("utf-8", errors="replace"), destination, "", 0)
+                elif kind == "data":
+                    if out is not None:
+                        size += len(payload)
+                        if size > max_bytes:
+                            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                        digest.update(payload)
+                        await out.write(payload)
+                    else:
+                        field_value += payload
+                        if len(field_value) > MAX_FIELD_BYTES:
+                            raise ValueError(f"Form field '{field_name}' is too large")
+                else:
+                    if out is not None:
+                        await out.close()
+                        out = None
+                        upload.sha256 = digest.hexdigest()
+                        upload.size = size
+                    elif field_name:
+                        fields[field_name] = field_value.decode("utf-8", errors="replace")
+                    field_name = None
+
+            events.clear()
+
+        parser.finalize()
+        if out is not None:
+            # The body ended inside the file part; don't keep a truncated file
+            raise ValueError("Upload ended before the file was complete")
+    except Exception:
+        if out is not None:
+            await out.close()
+        Path(destination).unlink(missing_ok=True)
+        raise
+
+    # A file input left empty in a browser form still sends a zero-byte part
+    if upload is not None and upload.size == 0:
+        Path(destination).unlink(missing_ok=True)
+        upload = None
+
+    return fields, upload
@@ -1,19 +1,88 @@
 import requests
 import re
-from typing import Tuple
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Optional, Tuple
 from urllib.parse import urlparse
 import tempfile
 import os
 
+from telemetry import span
+
+from .html_extractor import extract_text_from_html
+
+HTML_CHUNK_SIZE = 64 * 1024
+PDF_CHUNK_SIZE = 1024 * 1024
+
+ARXIV_ID_PATTERN = re.compile(
+    r'^(?:arxiv:)?(\d{4}\.\d{4,5}(?:v\d+)?|[a-z\-]+(?:\.[a-z]{2})?/\d{7}(?:v\d+)?)$',
+    re.IGNORECASE
+)
+
+class HostThrottle:
+    """Per-host politeness limits shared by concurrent fetches."""
+    
+    def __init__(self, max_per_host: int = 2, min_interval: float = 1.0):
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_slot = {}
+    
+    @contextmanager
+    def acquire(self, url: str):
+        """Hold a slot for the URL's host, spacing request starts by min_interval."""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.Semaphore(self.max_per_host))
+        
+        semaphore.acquire()
+        try:
+            with self._lock:
+                now = time.monotonic()
+                slot = max(now, self._next_slot.get(host, 0.0))
+                self._next_slot[host] = slot + self.min_interval
+            if slot > now:
+                time.sleep(slot - now)
+            yield
+        finally:
+            semaphore.release()
+
 class URLProcessor:
-    def __init__(self):
+    def __init__(self, throttle: Optional[HostThrottle] = None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        self.throttle = throttle
+    
+    def normalize_source(self, source: str) -> str:
+        """Turn a bare arXiv ID (e.g. 2301.00001 or arXiv:2301.00001) into an arXiv URL."""
+        source = source.strip()
+        match = ARXIV_ID_PATTERN.match(source)
+        if match:
+            return f"https://arxiv.org/abs/{match.group(1)}"
+        return source
+    
+    @contextmanager
+    def _open(self, url: str, **kwargs):
+        """GET a URL and close the response afterwards.
+        
+        With a host throttle, the slot is held until the caller is done with
+        the response, so streamed bodies count against the per-host limit too.
+        """
+        slot = self.throttle.acquire(url) if self.throttle is not None else nullcontext()
+        with slot:
+            with span("url.request"):
+                response = self.session.get(url, **kwargs)
+            with response:
+                yield response
     
     def process_url(self, url: str) -> Tuple[str, str]:
         """Process a URL and extract paper content."""
+        url = self.normalize_source(url)
+        
         # Check if it's an arXiv URL
         if 'arxiv.org' in url:
             return self._process_arxiv_url(url)
@@ -57,15 +126,17 @@ class URLProcessor:
     def _process_pdf_url(self, url: str) -> Tuple[str, str]:
         """Download and process PDF from URL."""
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # Save to temporary file
+            # Stream to a temporary file instead of holding the PDF in memory
             with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                temp_file.write(response.content)
                 temp_path = temp_file.name
             
             try:
+                with self._open(url, timeout=30, stream=True) as response:
+                    response.raise_for_status()
+                    with span("url.download"), open(temp_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=PDF_CHUNK_SIZE):
+                            f.write(chunk)
+                
                 # Process the PDF
                 from .pdf_processor import PDFProcessor
                 processor = PDFProcessor()
@@ -85,33 +156,24 @@ class URLProcessor:
     def _process_web_page(self, url: str) -> Tuple[str, str]:
         """Extract text content from a web page."""
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # Basic HTML text extraction
-            html_content = response.text
-            
-            # Remove HTML tags (basic approach)
-            text = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-            text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-            text = re.sub(r'<[^>]+>', '', text)
-            
-            # Clean up whitespace
-            text = re.sub(r'\n\s*\n', '\n\n', text)
-            text = re.sub(r' +', ' ', text)
-            
-            # Extract title from HTML
-            title_match = re.search(r'<title[^>]*>(.*?)</title>', html_content, re.IGNORECASE | re.DOTALL)
-            title = title_match.group(1).strip() if title_match else "Web Page Content"
+            with self._open(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                
+                # Parse the page incrementally as it downloads
+                if not response.encoding:
+                    response.encoding = 'utf-8'
+                with span("url.extract_html"):
+                    text, title = extract_text_from_html(
+                        response.iter_content(chunk_size=HTML_CHUNK_SIZE, decode_unicode=True)
+                    )
             
-            # Clean title
-            title = re.sub(r'<[^>]+>', '', title)
-            title = title.strip()
+            if not title:
+                title = "Web Page Content"
             
-            if not text.strip():
+            if not text:
                 raise ValueError("No text content could be extracted from the web page")
             
-            return text.strip(), title
+            return text, title
             
         except Exception as e:
             raise Exception(f"Error processing web page: {str(e)}")
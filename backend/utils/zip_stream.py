@@ -0,0 +1,73 @@
+import zipfile
+from pathlib import Path
+from typing import Iterator
+
+class _WriteBuffer:
+    """Unseekable sink that hands written bytes back to the caller in pieces."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class ZipStreamWriter:
+    """Builds a zip archive incrementally, yielding bytes as each piece is written.
+
+    The archive is never assembled in memory: entries use data descriptors
+    (the stream is unseekable), and only the bytes for the current read
+    chunk are buffered between yields.
+    """
+
+    def __init__(self, chunk_size: int = 1024 * 1024):
+        self.chunk_size = chunk_size
+        self._buffer = _WriteBuffer()
+        self._zip = zipfile.ZipFile(self._buffer, mode="w")
+
+    def add_file(self, path: str, arcname: str, compress: bool = True) -> Iterator[bytes]:
+        """Add a file to the archive, yielding archive bytes as they are produced."""
+        info = zipfile.ZipInfo.from_file(path, arcname)
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+
+        with open(path, "rb") as src, self._zip.open(info, mode="w") as dest:
+            while True:
+                data = src.read(self.chunk_size)
+                if not data:
+                    break
+                dest.write(data)
+                chunk = self._buffer.drain()
+                if chunk:
+                    yield chunk
+
+        chunk = self._buffer.drain()
+        if chunk:
+            yield chunk
+
+    def add_text(self, arcname: str, text: str) -> bytes:
+        """Add a small in-memory text entry and return the bytes produced."""
+        self._zip.writestr(arcname, text, compress_type=zipfile.ZIP_DEFLATED)
+        return self._buffer.drain()
+
+    def close(self) -> bytes:
+        """Finish the archive and return the central directory bytes."""
+        self._zip.close()
+        return self._buffer.drain()
+
+def safe_archive_name(title: str, paper_id: str, extension: str) -> str:
+    """File name for a paper inside an archive; the ID suffix keeps names unique."""
+    safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+    return f"{safe_title[:80] or 'paper'} ({paper_id[:8]}).{Path(extension).name}"
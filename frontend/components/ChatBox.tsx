@@ -17,6 +17,7 @@ export default function ChatBox({ paperId }: ChatBoxProps) {
   const [messages, setMessages] = useState<Message[]>([])
   const [input, setInput] = useState('')
   const [loading, setLoading] = useState(false)
+  const [sessionId, setSessionId] = useState<string | undefined>(undefined)
   const messagesEndRef = useRef<HTMLDivElement>(null)
 
   const scrollToBottom = () => {
@@ -27,6 +28,12 @@ export default function ChatBox({ paperId }: ChatBoxProps) {
     scrollToBottom()
   }, [messages])
 
+  // Navigating to another paper (e.g. a related one) starts a new conversation
+  useEffect(() => {
+    setMessages([])
+    setSessionId(undefined)
+  }, [paperId])
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault()
     
@@ -44,7 +51,8 @@ export default function ChatBox({ paperId }: ChatBoxProps) {
     setLoading(true)
 
     try {
-      const response = await chatWithPaper(paperId, input.trim())
+      const response = await chatWithPaper(paperId, input.trim(), sessionId)
+      setSessionId(response.session_id)
       
       const assistantMessage: Message = {
         id: (Date.now() + 1).toString(),
@@ -13,6 +13,15 @@ export interface PaperUploadResponse {
   message: string
 }
 
+export type SummaryFacet = 'summary' | 'pros_cons' | 'future_work'
+
+export interface FacetStatus {
+  status: 'pending' | 'running' | 'ready' | 'failed'
+  error?: string
+  // Unix time after which a failed facet is generated again without an explicit retry
+  retry_at?: number
+}
+
 export interface PaperSummary {
   paper_id: string
   title: string
@@ -20,10 +29,18 @@ export interface PaperSummary {
   pros: string[]
   cons: string[]
   future_work: string[]
+  facets: Record<SummaryFacet, FacetStatus>
+}
+
+export interface RelatedPaper {
+  paper_id: string
+  title: string
+  similarity: number
 }
 
 export interface ChatResponse {
   response: string
+  session_id: string
 }
 
 export async function uploadPaper(file: File): Promise<PaperUploadResponse> {
@@ -64,9 +81,11 @@ export async function uploadPaperFromURL(url: string): Promise<PaperUploadRespon
   }
 }
 
-export async function getPaperSummary(paperId: string): Promise<PaperSummary> {
+export async function getPaperSummary(paperId: string, facets?: SummaryFacet[], retry = false): Promise<PaperSummary> {
   try {
-    const response = await api.get(`/summary/${paperId}`)
+    // Facets not generated yet are generated by this request; recently failed ones only with retry
+    const params = { ...(facets ? { facets: facets.join(',') } : {}), ...(retry ? { retry: true } : {}) }
+    const response = await api.get(`/summary/${paperId}`, { params })
     return response.data
   } catch (error) {
     if (axios.isAxiosError(error)) {
@@ -76,9 +95,21 @@ export async function getPaperSummary(paperId: string): Promise<PaperSummary> {
   }
 }
 
-export async function chatWithPaper(paperId: string, query: string): Promise<ChatResponse> {
+export async function getRelatedPapers(paperId: string, topK: number = 5): Promise<RelatedPaper[]> {
+  try {
+    const response = await api.get(`/papers/${paperId}/related`, { params: { top_k: topK } })
+    return response.data.related
+  } catch (error) {
+    if (axios.isAxiosError(error)) {
+      throw new Error(error.response?.data?.detail || 'Failed to get related papers')
+    }
+    throw error
+  }
+}
+
+export async function chatWithPaper(paperId: string, query: string, sessionId?: string): Promise<ChatResponse> {
   try {
-    const response = await api.post(`/chat/${paperId}`, { query })
+    const response = await api.post(`/chat/${paperId}`, { query, session_id: sessionId })
     return response.data
   } catch (error) {
     if (axios.isAxiosError(error)) {
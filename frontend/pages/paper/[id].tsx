@@ -1,18 +1,37 @@
 import { useState, useEffect } from 'react'
 import { useRouter } from 'next/router'
 import Head from 'next/head'
-import { Download, MessageCircle, FileText, ThumbsUp, ThumbsDown, Lightbulb } from 'lucide-react'
+import { Download, MessageCircle, FileText, ThumbsUp, ThumbsDown, Lightbulb, Link2 } from 'lucide-react'
 import Layout from '@/components/Layout'
 import ChatBox from '@/components/ChatBox'
-import { getPaperSummary, exportPaper } from '@/lib/api'
-
-interface PaperData {
-  paper_id: string
-  title: string
-  summary: string
-  pros: string[]
-  cons: string[]
-  future_work: string[]
+import { getPaperSummary, getRelatedPapers, exportPaper, PaperSummary, RelatedPaper, SummaryFacet } from '@/lib/api'
+
+type PaperData = PaperSummary
+
+interface FacetPlaceholderProps {
+  paper: PaperData
+  facet: SummaryFacet
+  label: string
+  loading: boolean
+  onExpand: (facet: SummaryFacet) => void
+}
+
+// Detail facets are generated only when the reader asks for them
+function FacetPlaceholder({ paper, facet, label, loading, onExpand }: FacetPlaceholderProps) {
+  const status = paper.facets?.[facet]
+  if (loading || status?.status === 'running') {
+    return <p className="text-gray-500">Generating...</p>
+  }
+  return (
+    <div>
+      {status?.status === 'failed' && (
+        <p className="text-red-600 mb-2">Could not generate this section: {status.error}</p>
+      )}
+      <button onClick={() => onExpand(facet)} className="btn-secondary">
+        {status?.status === 'failed' ? 'Try again' : label}
+      </button>
+    </div>
+  )
 }
 
 export default function PaperPage() {
@@ -22,17 +41,20 @@ export default function PaperPage() {
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [activeTab, setActiveTab] = useState<'summary' | 'chat'>('summary')
+  const [loadingFacets, setLoadingFacets] = useState<SummaryFacet[]>([])
+  const [related, setRelated] = useState<RelatedPaper[]>([])
 
   useEffect(() => {
     if (id && typeof id === 'string') {
       loadPaper(id)
+      loadRelated(id)
     }
   }, [id])
 
   const loadPaper = async (paperId: string) => {
     try {
       setLoading(true)
-      const data = await getPaperSummary(paperId)
+      const data = await getPaperSummary(paperId, ['summary'])
       setPaper(data)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to load paper')
@@ -41,6 +63,32 @@ export default function PaperPage() {
     }
   }
 
+  const loadRelated = async (paperId: string) => {
+    try {
+      setRelated(await getRelatedPapers(paperId))
+    } catch (err) {
+      // Related papers are optional; the page works without them
+      setRelated([])
+    }
+  }
+
+  const isReady = (facet: SummaryFacet) => !paper?.facets || paper.facets[facet]?.status === 'ready'
+
+  const expandFacet = async (facet: SummaryFacet) => {
+    if (!paper) return
+
+    setLoadingFacets((facets) => [...facets, facet])
+    try {
+      // "Try again" on a failed section retries right away instead of waiting out the backoff
+      const data = await getPaperSummary(paper.paper_id, [facet], paper.facets?.[facet]?.status === 'failed')
+      setPaper(data)
+    } catch (err) {
+      console.error('Loading section failed:', err)
+    } finally {
+      setLoadingFacets((facets) => facets.filter((f) => f !== facet))
+    }
+  }
+
   const handleExport = async (format: 'pdf' | 'markdown') => {
     if (!paper) return
     
@@ -151,59 +199,111 @@ export default function PaperPage() {
                     <section>
                       <h2 className="text-2xl font-bold text-gray-900 mb-4">Summary</h2>
                       <div className="prose max-w-none">
-                        <p className="text-gray-700 leading-relaxed">{paper.summary}</p>
+                        {paper.facets?.summary?.status === 'failed' ? (
+                          <p className="text-red-600">Could not generate the summary: {paper.facets.summary.error}</p>
+                        ) : (
+                          <p className="text-gray-700 leading-relaxed">{paper.summary}</p>
+                        )}
                       </div>
                     </section>
 
-                    <div className="grid md:grid-cols-2 gap-8">
-                      {/* Strengths */}
+                    {isReady('pros_cons') ? (
+                      <div className="grid md:grid-cols-2 gap-8">
+                        {/* Strengths */}
+                        <section>
+                          <div className="flex items-center gap-2 mb-4">
+                            <ThumbsUp className="w-5 h-5 text-green-600" />
+                            <h2 className="text-xl font-bold text-gray-900">Strengths</h2>
+                          </div>
+                          <ul className="space-y-3">
+                            {paper.pros.map((pro, index) => (
+                              <li key={index} className="flex items-start gap-3">
+                                <div className="w-2 h-2 bg-green-500 rounded-full mt-2 flex-shrink-0"></div>
+                                <span className="text-gray-700">{pro}</span>
+                              </li>
+                            ))}
+                          </ul>
+                        </section>
+
+                        {/* Weaknesses */}
+                        <section>
+                          <div className="flex items-center gap-2 mb-4">
+                            <ThumbsDown className="w-5 h-5 text-red-600" />
+                            <h2 className="text-xl font-bold text-gray-900">Weaknesses</h2>
+                          </div>
+                          <ul className="space-y-3">
+                            {paper.cons.map((con, index) => (
+                              <li key={index} className="flex items-start gap-3">
+                                <div className="w-2 h-2 bg-red-500 rounded-full mt-2 flex-shrink-0"></div>
+                                <span className="text-gray-700">{con}</span>
+                              </li>
+                            ))}
+                          </ul>
+                        </section>
+                      </div>
+                    ) : (
                       <section>
-                        <div className="flex items-center gap-2 mb-4">
-                          <ThumbsUp className="w-5 h-5 text-green-600" />
-                          <h2 className="text-xl font-bold text-gray-900">Strengths</h2>
-                        </div>
+                        <h2 className="text-xl font-bold text-gray-900 mb-4">Strengths & Weaknesses</h2>
+                        <FacetPlaceholder
+                          paper={paper}
+                          facet="pros_cons"
+                          label="Show strengths & weaknesses"
+                          loading={loadingFacets.includes('pros_cons')}
+                          onExpand={expandFacet}
+                        />
+                      </section>
+                    )}
+
+                    {/* Future Work */}
+                    <section>
+                      <div className="flex items-center gap-2 mb-4">
+                        <Lightbulb className="w-5 h-5 text-yellow-600" />
+                        <h2 className="text-xl font-bold text-gray-900">Future Work</h2>
+                      </div>
+                      {isReady('future_work') ? (
                         <ul className="space-y-3">
-                          {paper.pros.map((pro, index) => (
+                          {paper.future_work.map((work, index) => (
                             <li key={index} className="flex items-start gap-3">
-                              <div className="w-2 h-2 bg-green-500 rounded-full mt-2 flex-shrink-0"></div>
-                              <span className="text-gray-700">{pro}</span>
+                              <div className="w-2 h-2 bg-yellow-500 rounded-full mt-2 flex-shrink-0"></div>
+                              <span className="text-gray-700">{work}</span>
                             </li>
                           ))}
                         </ul>
-                      </section>
+                      ) : (
+                        <FacetPlaceholder
+                          paper={paper}
+                          facet="future_work"
+                          label="Suggest future work"
+                          loading={loadingFacets.includes('future_work')}
+                          onExpand={expandFacet}
+                        />
+                      )}
+                    </section>
 
-                      {/* Weaknesses */}
+                    {/* Related Papers */}
+                    {related.length > 0 && (
                       <section>
                         <div className="flex items-center gap-2 mb-4">
-                          <ThumbsDown className="w-5 h-5 text-red-600" />
-                          <h2 className="text-xl font-bold text-gray-900">Weaknesses</h2>
+                          <Link2 className="w-5 h-5 text-primary-600" />
+                          <h2 className="text-xl font-bold text-gray-900">Related Papers</h2>
                         </div>
                         <ul className="space-y-3">
-                          {paper.cons.map((con, index) => (
-                            <li key={index} className="flex items-start gap-3">
-                              <div className="w-2 h-2 bg-red-500 rounded-full mt-2 flex-shrink-0"></div>
-                              <span className="text-gray-700">{con}</span>
+                          {related.map((other) => (
+                            <li key={other.paper_id}>
+                              <button
+                                onClick={() => router.push(`/paper/${other.paper_id}`)}
+                                className="text-primary-600 hover:underline text-left"
+                              >
+                                {other.title}
+                              </button>
+                              <span className="text-gray-500 text-sm ml-2">
+                                {Math.round(other.similarity * 100)}% similar
+                              </span>
                             </li>
                           ))}
                         </ul>
                       </section>
-                    </div>
-
-                    {/* Future Work */}
-                    <section>
-                      <div className="flex items-center gap-2 mb-4">
-                        <Lightbulb className="w-5 h-5 text-yellow-600" />
-                        <h2 className="text-xl font-bold text-gray-900">Future Work</h2>
-                      </div>
-                      <ul className="space-y-3">
-                        {paper.future_work.map((work, index) => (
-                          <li key={index} className="flex items-start gap-3">
-                            <div className="w-2 h-2 bg-yellow-500 rounded-full mt-2 flex-shrink-0"></div>
-                            <span className="text-gray-700">{work}</span>
-                          </li>
-                        ))}
-                      </ul>
-                    </section>
+                    )}
                   </div>
                 ) : (
                   <ChatBox paperId={paper.paper_id} />
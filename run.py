@@ -33,12 +33,19 @@ def main():
     print("📖 API docs will be at http://localhost:8000/docs")
     print("🛑 Press Ctrl+C to stop")
 
+    # Several workers share the index through rag_storage snapshots;
+    # --reload only supports a single worker
+    workers = int(os.environ.get("WORKERS", "1"))
+    command = ["python", "-m", "uvicorn", "app:app", "--host", "0.0.0.0", "--port", "8000"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+        print(f"👥 Running {workers} workers")
+    else:
+        command.append("--reload")
+
     # Start backend with environment variable
     try:
-        subprocess.run([
-            "python", "-m", "uvicorn", "app:app",
-            "--reload", "--host", "0.0.0.0", "--port", "8000"
-        ], cwd="backend", env=os.environ)
+        subprocess.run(command, cwd="backend", env=os.environ)
     except KeyboardInterrupt:
         print("\n🛑 Stopping backend...")
         return 0
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for deciding which chat questions are rewritten as follow-ups
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("OPENROUTER_API_KEY", "follow-up-test")
+
+from rag_pipeline import RAGPipeline
+
+FOLLOW_UPS = [
+    "How does it work?",
+    "Tell me more about it",
+    "Can you explain that in more detail?",
+    "And the baselines?",
+    "What about the dataset?",
+    "Why is that?",
+]
+
+STANDALONE = [
+    "What does this paper propose?",
+    "What are the main results?",
+    "Explain the ablation study",
+    "Does the paper show that attention helps?",
+]
+
+def make_pipeline() -> RAGPipeline:
+    return RAGPipeline(storage_dir=tempfile.mkdtemp(), load=False)
+
+def test_follow_ups_are_detected():
+    pipeline = make_pipeline()
+    for question in FOLLOW_UPS:
+        assert pipeline._is_follow_up(question), question
+
+def test_standalone_questions_are_left_alone():
+    pipeline = make_pipeline()
+    for question in STANDALONE:
+        assert not pipeline._is_follow_up(question), question
+
+def main():
+    """Run the follow-up detection tests."""
+    test_follow_ups_are_detected()
+    test_standalone_questions_are_left_alone()
+    print("✅ Follow-up detection tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
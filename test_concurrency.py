@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Stress test for concurrent ingest and query against RAGPipeline
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("OPENROUTER_API_KEY", "stress-test")
+
+from rag_pipeline import RAGPipeline
+
+WORDS = ["transformer", "attention", "gradient", "dataset", "benchmark", "encoder",
+         "latency", "resnet-50", "ablation", "baseline", "retrieval", "token"]
+
+def make_document(paper_id: str, sentences: int = 120) -> str:
+    """Generate a document whose every sentence names its paper."""
+    rng = random.Random(paper_id)
+    return " ".join(
+        f"{paper_id} reports {' '.join(rng.choice(WORDS) for _ in range(12))}."
+        for _ in range(sentences)
+    )
+
+def check_snapshot(snapshot) -> list:
+    """Return inconsistencies between the parts of one snapshot."""
+    problems = []
+    for paper_id, chunks in snapshot.chunks.items():
+        if paper_id not in snapshot.documents:
+            problems.append(f"{paper_id}: chunks without document")
+        if len(snapshot.chunk_embeddings.get(paper_id, ())) != len(chunks):
+            problems.append(f"{paper_id}: {len(chunks)} chunks but different number of embeddings")
+        if len(snapshot.chunk_spans.get(paper_id, ())) != len(chunks):
+            problems.append(f"{paper_id}: {len(chunks)} chunks but different number of spans")
+        if paper_id not in snapshot.bm25.papers:
+            problems.append(f"{paper_id}: missing BM25 postings")
+    return problems
+
+def test_parallel_ingest_and_query(writers: int = 4, readers: int = 8, papers_per_writer: int = 10):
+    """Ingest from several threads while others search; every result must be consistent."""
+    with tempfile.TemporaryDirectory() as storage_dir:
+        pipeline = RAGPipeline(storage_dir=storage_dir)
+        pipeline.refresh_interval = 0.0
+
+        ingested = []
+        errors = []
+        searches = [0]
+        done = threading.Event()
+        lock = threading.Lock()
+
+        def writer(worker: int):
+            try:
+                for i in range(papers_per_writer):
+                    paper_id = f"paper-{worker}-{i}"
+                    pipeline.add_document(paper_id, make_document(paper_id))
+                    with lock:
+                        ingested.append(paper_id)
+            except Exception as e:
+                errors.append(f"writer {worker}: {e!r}")
+
+        def reader(worker: int):
+            rng = random.Random(worker)
+            while not done.is_set():
+                try:
+                    snapshot = pipeline.snapshot()
+                    errors.extend(check_snapshot(snapshot))
+
+                    with lock:
+                        known = list(ingested)
+                    if not known:
+                        # Yield so the first writer is not starved of the GIL
+                        time.sleep(0.001)
+                        continue
+                    paper_id = rng.choice(known)
+                    chunks = pipeline._find_relevant_chunks(paper_id, rng.choice(WORDS))
+                    if not chunks:
+                        errors.append(f"reader {worker}: no chunks for ingested {paper_id}")
+                    for chunk in chunks:
+                        if paper_id not in chunk:
+                            errors.append(f"reader {worker}: chunk from another paper returned for {paper_id}")
+                    with lock:
+                        searches[0] += 1
+                except Exception as e:
+                    errors.append(f"reader {worker}: {e!r}")
+
+        reader_threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        writer_threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+
+        start = time.perf_counter()
+        for thread in reader_threads + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        done.set()
+        for thread in reader_threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        assert not errors, errors[:5]
+        expected = writers * papers_per_writer
+        assert sorted(ingested) == sorted(pipeline.chunks), "ingested papers missing from the index"
+        assert searches[0] > 0, "readers never searched an ingested paper"
+
+        reloaded = RAGPipeline(storage_dir=storage_dir)
+        assert len(reloaded.chunks) == expected, f"expected {expected} papers on disk, found {len(reloaded.chunks)}"
+        assert not check_snapshot(reloaded.snapshot()), check_snapshot(reloaded.snapshot())[:5]
+
+        print(f"✅ {expected} papers ingested alongside {searches[0]} searches in {elapsed:.1f}s")
+
+def main():
+    """Run the stress test."""
+    print("🧪 Stress testing concurrent ingest and query...")
+    print("=" * 50)
+
+    try:
+        test_parallel_ingest_and_query()
+        ok = True
+    except AssertionError as e:
+        print(f"❌ Concurrency test failed: {e}")
+        ok = False
+
+    print("=" * 50)
+    print("🎉 Done!" if ok else "❌ Concurrency issues found")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for the execution layer's worker pools
+"""
+
+import asyncio
+import os
+import sys
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from executors import ExecutionLayer
+
+def test_cpu_pool_recovers_after_worker_crash():
+    """A worker that dies breaks only the call it was running."""
+    async def scenario():
+        execution = ExecutionLayer(cpu_workers=1, io_workers=1)
+        try:
+            assert await execution.run_cpu(abs, -2) == 2
+            try:
+                await execution.run_cpu(os._exit, 1)
+            except BrokenProcessPool:
+                pass
+            else:
+                raise AssertionError("expected the crashed worker to break the pool")
+
+            assert await execution.run_cpu(abs, -4) == 4
+            stats = execution.stats()["cpu"]
+            assert stats["restarts"] == 1, stats
+            assert stats["failed"] == 1, stats
+        finally:
+            execution.shutdown()
+
+    asyncio.run(scenario())
+
+def main():
+    """Run the execution layer tests."""
+    test_cpu_pool_recovers_after_worker_crash()
+    print("✅ Execution layer tests passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())